@@ -16,6 +16,9 @@ import sys
 import json
 import sqlite3
 import re
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import unquote
 from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, make_response
 
@@ -39,6 +42,12 @@ app = Flask(__name__)
 # Global settings (loaded on startup)
 _settings = None
 
+# Image formats written by the extractors, mapped to their MIME types
+IMAGE_EXTENSIONS = {'.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg'}
+
+# Threads hashing source files for incremental indexing (I/O bound)
+HASH_THREADS = 16
+
 
 def get_settings():
     """Get application settings."""
@@ -146,6 +155,16 @@ def init_db():
     ''')
     c.execute('CREATE INDEX IF NOT EXISTS idx_space ON diagrams(space_key)')
     c.execute('CREATE INDEX IF NOT EXISTS idx_name ON diagrams(diagram_name)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_metadata_path ON diagrams(metadata_path)')
+
+    # Content hash of each metadata file as last indexed (incremental indexing)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS index_hashes (
+            path TEXT PRIMARY KEY,
+            sha BLOB NOT NULL,
+            indexed_at REAL
+        )
+    ''')
 
     # Applications tables
     c.execute('''
@@ -212,6 +231,25 @@ def init_index():
         create_in(index_dir, get_schema())
 
 
+# Search query parser and the schema field names it was built for
+_search_parser = None
+_search_parser_fields = None
+
+
+def get_search_parser(schema):
+    """Get the search query parser, built once and reused while the index schema's fields match."""
+    global _search_parser, _search_parser_fields
+    fields = tuple(schema.names())
+    if _search_parser is None or _search_parser_fields != fields:
+        _search_parser = MultifieldParser(
+            ['diagram_name', 'page_title', 'content', 'author'],
+            schema=schema,
+            group=OrGroup
+        )
+        _search_parser_fields = fields
+    return _search_parser
+
+
 def index_is_populated():
     """Check if Whoosh index exists and has documents."""
     index_dir = get_index_dir()
@@ -256,9 +294,91 @@ def applications_enabled():
 # Indexing Functions
 # =============================================================================
 
-def index_all_diagrams(progress_callback=None):
+def iter_space_metadata(metadata_space_dir):
+    """
+    Yield (meta_path, meta) for every diagram in a space's metadata directory.
+
+    Reads per-diagram .json files (DrawIO extractor) and .jsonl batch files
+    (Lucidchart screenshotter, one record per line). In a .jsonl file a later
+    record with the same title replaces an earlier one.
+    """
+    for meta_file in os.listdir(metadata_space_dir):
+        meta_path = os.path.join(metadata_space_dir, meta_file)
+
+        if meta_file.endswith('.json'):
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except Exception as e:
+                print(f"Error processing {meta_path}: {e}")
+                continue
+            yield meta_path, meta
+
+        elif meta_file.endswith('.jsonl'):
+            records = {}
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                for line_num, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        meta = json.loads(line)
+                    except ValueError as e:
+                        print(f"Error processing {meta_path} line {line_num}: {e}")
+                        continue
+                    records[meta.get('title', '')] = meta
+            for meta in records.values():
+                yield meta_path, meta
+
+
+def diagram_paths(meta, space_key, diagrams_dir, images_dir):
+    """Return (diagram_name, drawio_path, image_path) for a metadata record."""
+    title = meta.get('title', '')
+    diagram_name, image_ext = os.path.splitext(title)
+    if image_ext.lower() not in IMAGE_EXTENSIONS:
+        diagram_name, image_ext = title, '.png'
+    drawio_path = os.path.join(diagrams_dir, space_key, f'{diagram_name}.drawio')
+    image_path = os.path.join(images_dir, space_key, f'{diagram_name}{image_ext}')
+    return diagram_name, drawio_path, image_path
+
+
+def metadata_digest(meta_path, drawio_paths):
+    """Content hash of a metadata file and the .drawio files its records point at."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(meta_path, 'rb') as f:
+        digest.update(f.read())
+    for drawio_path in drawio_paths:
+        digest.update(drawio_path.encode('utf-8'))
+        try:
+            with open(drawio_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            digest.update(b'\0')  # no .drawio: the text comes from the metadata
+        else:
+            digest.update(b'\1%d:' % len(data))
+            digest.update(data)
+    return digest.digest()
+
+
+def remove_indexed_diagrams(c, writer, meta_path):
+    """Delete the diagrams indexed from a metadata file from the database and Whoosh index."""
+    diagram_ids = [row[0] for row in
+                   c.execute('SELECT id FROM diagrams WHERE metadata_path = ?', (meta_path,)).fetchall()]
+    for diagram_id in diagram_ids:
+        c.execute('DELETE FROM diagram_applications WHERE diagram_id = ?', (diagram_id,))
+        writer.delete_by_term('id', str(diagram_id))
+    c.execute('DELETE FROM diagrams WHERE metadata_path = ?', (meta_path,))
+
+
+def index_all_diagrams(progress_callback=None, incremental=False):
     """
     Scan all diagrams and populate database + Whoosh index.
+
+    With incremental=True only metadata files whose content hash (including
+    the .drawio files they name) changed since the last run are re-indexed,
+    and diagrams whose metadata file is gone are removed. A changed
+    applications file still means a full pass.
+
+    Returns the number of diagrams indexed by this run.
     """
     settings = get_settings()
     metadata_dir = settings['metadata_directory']
@@ -270,18 +390,36 @@ def index_all_diagrams(progress_callback=None):
 
     conn = get_db()
     c = conn.cursor()
-    c.execute('DELETE FROM diagram_applications')
-    c.execute('DELETE FROM applications')
-    c.execute('DELETE FROM diagrams')  # Clear existing data
 
     # Load applications and build lookup map
     app_names = load_applications()
-    app_id_map = {}  # {lowercase_name: id}
-    for name in app_names:
-        c.execute('INSERT INTO applications (name) VALUES (?)', (name,))
-        app_id_map[name.lower()] = c.lastrowid
-
-    ix = open_dir(get_index_dir())
+    if incremental:
+        # Matches are stored per diagram, so a changed list needs a full pass
+        indexed_apps = [row['name'] for row in c.execute('SELECT name FROM applications ORDER BY id')]
+        incremental = indexed_apps == app_names
+
+    if incremental:
+        app_id_map = {row['name'].lower(): row['id']
+                      for row in c.execute('SELECT id, name FROM applications')}
+        indexed_hashes = {row['path']: row['sha']
+                          for row in c.execute('SELECT path, sha FROM index_hashes')}
+    else:
+        c.execute('DELETE FROM diagram_applications')
+        c.execute('DELETE FROM applications')
+        c.execute('DELETE FROM diagrams')  # Clear existing data
+        c.execute('DELETE FROM index_hashes')
+
+        app_id_map = {}  # {lowercase_name: id}
+        for name in app_names:
+            c.execute('INSERT INTO applications (name) VALUES (?)', (name,))
+            app_id_map[name.lower()] = c.lastrowid
+        indexed_hashes = {}
+
+    if incremental:
+        ix = open_dir(get_index_dir())
+    else:
+        # Start the Whoosh index over too, or documents of deleted rows pile up
+        ix = create_in(get_index_dir(), get_schema())
     writer = ix.writer()
 
     # Get all spaces from metadata directory
@@ -292,6 +430,33 @@ def index_all_diagrams(progress_callback=None):
               if os.path.isdir(os.path.join(metadata_dir, d))]
 
     total_indexed = 0
+    seen_paths = set()
+    failed_paths = set()  # metadata files with a record that could not be indexed
+
+    def changed_records(space_key, metadata_space_dir):
+        """Yield (meta_path, meta) for the records of metadata files that changed since the last run."""
+        # A metadata file, with the .drawio files it names, is the unit of change
+        space_records = {}
+        for meta_path, meta in iter_space_metadata(metadata_space_dir):
+            space_records.setdefault(meta_path, []).append(meta)
+        drawio_paths = [[diagram_paths(meta, space_key, diagrams_dir, images_dir)[1] for meta in metas]
+                        for metas in space_records.values()]
+        with ThreadPoolExecutor(max_workers=HASH_THREADS) as pool:
+            digests = list(pool.map(metadata_digest, space_records, drawio_paths))
+
+        for (meta_path, metas), digest in zip(space_records.items(), digests):
+            seen_paths.add(meta_path)
+            if indexed_hashes.get(meta_path) == digest:
+                continue
+            if incremental:
+                remove_indexed_diagrams(c, writer, meta_path)
+            for meta in metas:
+                yield meta_path, meta
+            # Resumed only once the caller has processed the last record; a file
+            # with a failed record keeps its old hash, so the next run retries it
+            if meta_path not in failed_paths:
+                c.execute('INSERT OR REPLACE INTO index_hashes (path, sha, indexed_at) VALUES (?, ?, ?)',
+                          (meta_path, digest, time.time()))
 
     for space_idx, space_key in enumerate(spaces):
         metadata_space_dir = os.path.join(metadata_dir, space_key)
@@ -299,20 +464,12 @@ def index_all_diagrams(progress_callback=None):
         if progress_callback:
             progress_callback(space_idx + 1, len(spaces), space_key, total_indexed)
 
-        # Process each metadata file
-        for meta_file in os.listdir(metadata_space_dir):
-            if not meta_file.endswith('.json'):
-                continue
-
-            meta_path = os.path.join(metadata_space_dir, meta_file)
-
+        # Process each metadata record
+        for meta_path, meta in changed_records(space_key, metadata_space_dir):
             try:
-                with open(meta_path, 'r', encoding='utf-8') as f:
-                    meta = json.load(f)
-
                 # Extract info from metadata
-                title = meta.get('title', '')
-                diagram_name = title.replace('.png', '') if title.endswith('.png') else title
+                diagram_name, drawio_path, image_path = diagram_paths(
+                    meta, space_key, diagrams_dir, images_dir)
 
                 # Extract page title and URL from webui link
                 # Check both DrawIO format (_links.webui) and Lucidchart format (page_link)
@@ -353,10 +510,6 @@ def index_all_diagrams(progress_callback=None):
                 # File size
                 file_size = meta.get('extensions', {}).get('fileSize', 0)
 
-                # Build file paths
-                drawio_path = os.path.join(diagrams_dir, space_key, f'{diagram_name}.drawio')
-                image_path = os.path.join(images_dir, space_key, f'{diagram_name}.png')
-
                 # Extract text content from .drawio file, or use body_text from metadata (Lucidchart)
                 content_text = ''
                 if os.path.exists(drawio_path):
@@ -364,6 +517,9 @@ def index_all_diagrams(progress_callback=None):
                 if not content_text:
                     # Fallback to body_text from metadata (used by Lucidchart screenshotter)
                     content_text = meta.get('body_text', '')
+                if meta.get('ocr_text'):
+                    # Text recognised inside Lucidchart screenshots
+                    content_text = f"{content_text} {meta['ocr_text']}".strip()
 
                 # Insert into database
                 c.execute('''
@@ -405,8 +561,14 @@ def index_all_diagrams(progress_callback=None):
 
             except Exception as e:
                 print(f"Error processing {meta_path}: {e}")
+                failed_paths.add(meta_path)
                 continue
 
+    # Metadata files deleted since the last run
+    for meta_path in indexed_hashes.keys() - seen_paths:
+        remove_indexed_diagrams(c, writer, meta_path)
+        c.execute('DELETE FROM index_hashes WHERE path = ?', (meta_path,))
+
     conn.commit()
     conn.close()
     writer.commit()
@@ -623,12 +785,7 @@ def search():
         ix = open_dir(get_index_dir())
 
         with ix.searcher() as searcher:
-            parser = MultifieldParser(
-                ['diagram_name', 'page_title', 'content', 'author'],
-                schema=ix.schema,
-                group=OrGroup
-            )
-            q = parser.parse(query)
+            q = get_search_parser(ix.schema).parse(query)
 
             results = searcher.search(q, limit=1000)
 
@@ -700,8 +857,12 @@ def serve_image(space_key, filename):
     """Serve diagram image."""
     settings = get_settings()
     image_path = os.path.join(settings['images_directory'], space_key, filename)
+    if not os.path.exists(image_path):
+        # Templates always link <name>.png; Lucidchart captures may be JPEG
+        base = os.path.splitext(image_path)[0]
+        image_path = next((base + ext for ext in IMAGE_EXTENSIONS if os.path.exists(base + ext)), image_path)
     if os.path.exists(image_path):
-        return send_file(image_path, mimetype='image/png')
+        return send_file(image_path, mimetype=IMAGE_EXTENSIONS.get(os.path.splitext(image_path)[1].lower(), 'image/png'))
     return "Image not found", 404
 
 
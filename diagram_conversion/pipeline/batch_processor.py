@@ -68,6 +68,11 @@ class BatchProcessor:
             if not os.path.isdir(space_img_dir):
                 continue
 
+            # Lucidchart screenshotter writes one JSONL file per space
+            jsonl_meta = self._load_jsonl_metadata(
+                os.path.join(metadata_dir, space_key, "diagrams.jsonl")
+            )
+
             for filename in sorted(os.listdir(space_img_dir)):
                 if not filename.lower().endswith((".png", ".jpg", ".jpeg")):
                     continue
@@ -76,8 +81,8 @@ class BatchProcessor:
                 diagram_name = os.path.splitext(filename)[0]
 
                 # Try to load metadata
-                meta = {}
-                meta_candidates = [
+                meta = jsonl_meta.get(filename, {})
+                meta_candidates = [] if meta else [
                     os.path.join(metadata_dir, space_key, f"{filename}.json"),
                     os.path.join(metadata_dir, space_key, f"{diagram_name}.json"),
                     os.path.join(metadata_dir, space_key, f"{diagram_name}.png.json"),
@@ -102,6 +107,24 @@ class BatchProcessor:
                      f"{len(set(d['space_key'] for d in discovered))} spaces")
         return discovered
 
+    @staticmethod
+    def _load_jsonl_metadata(jsonl_path: str) -> dict:
+        """Load a per-space metadata JSONL file as {title: record} (later lines win)."""
+        records = {}
+        if not os.path.exists(jsonl_path):
+            return records
+        with open(jsonl_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    meta = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping malformed line in {jsonl_path}")
+                    continue
+                records[meta.get("title", "")] = meta
+        return records
+
     def register_screenshots(self, screenshots: Optional[list[dict]] = None):
         """Register discovered screenshots in the database."""
         if screenshots is None:
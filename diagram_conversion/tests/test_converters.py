@@ -9,6 +9,7 @@ from diagram_conversion.converters.drawio_converter import DrawIOConverter, Conv
 from diagram_conversion.converters.classifier import DiagramClassifier, ClassificationResult, DIAGRAM_TYPES
 from diagram_conversion.converters.c4_converter import C4Converter, C4Model, C4ConversionResult
 from diagram_conversion.pipeline.database import ConversionDB
+from diagram_conversion.pipeline.batch_processor import BatchProcessor
 from diagram_conversion.config import ConversionConfig
 
 
@@ -358,5 +359,36 @@ class TestConversionDB:
         assert model["title"] == "Test System"
 
 
+# ── Batch Processor Tests ───────────────────────────────────────────
+
+class TestBatchProcessorMetadata:
+    def test_load_jsonl_later_line_wins(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "diagrams.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"title": "a.png", "page_title": "Old"}) + "\n")
+                f.write(json.dumps({"title": "b.png", "page_title": "Other"}) + "\n")
+                f.write(json.dumps({"title": "a.png", "page_title": "New"}) + "\n")
+
+            records = BatchProcessor._load_jsonl_metadata(path)
+            assert set(records) == {"a.png", "b.png"}
+            assert records["a.png"]["page_title"] == "New"
+
+    def test_load_jsonl_skips_malformed_lines(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "diagrams.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"title": "a.png"}) + "\n")
+                f.write("\n")
+                f.write('{"title": "b.png", "page_ti\n')  # cut off by a killed run
+                f.write(json.dumps({"title": "c.png"}) + "\n")
+
+            records = BatchProcessor._load_jsonl_metadata(path)
+            assert set(records) == {"a.png", "c.png"}
+
+    def test_load_jsonl_missing_file(self):
+        assert BatchProcessor._load_jsonl_metadata("/nonexistent/diagrams.jsonl") == {}
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,152 @@
+"""Tests for incremental indexing in the browser app."""
+
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("whoosh")
+
+from whoosh.index import open_dir
+
+import browser.app as app_module
+
+
+class TestIncrementalIndex:
+    def setup_method(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.metadata_dir = os.path.join(self.tmpdir, "metadata")
+        self.diagrams_dir = os.path.join(self.tmpdir, "diagrams")
+        os.makedirs(os.path.join(self.metadata_dir, "OPS"))
+        os.makedirs(os.path.join(self.diagrams_dir, "OPS"))
+
+        applications_file = os.path.join(self.tmpdir, "applications.txt")
+        with open(applications_file, "w") as f:
+            f.write("Billing\n")
+
+        self._saved_settings = app_module._settings
+        app_module._settings = {
+            "metadata_directory": self.metadata_dir,
+            "diagrams_directory": self.diagrams_dir,
+            "images_directory": os.path.join(self.tmpdir, "images"),
+            "database_path": os.path.join(self.tmpdir, "diagrams.db"),
+            "index_directory": os.path.join(self.tmpdir, "index"),
+            "applications_file": applications_file,
+        }
+
+    def teardown_method(self):
+        app_module._settings = self._saved_settings
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write_meta(self, name, title, body_text=""):
+        path = os.path.join(self.metadata_dir, "OPS", f"{name}.json")
+        with open(path, "w") as f:
+            json.dump({"title": title, "body_text": body_text}, f)
+        return path
+
+    def _write_drawio(self, name, label):
+        path = os.path.join(self.diagrams_dir, "OPS", f"{name}.drawio")
+        with open(path, "w") as f:
+            f.write(f'<mxfile><diagram name="{label}"></diagram></mxfile>')
+        return path
+
+    def _db_rows(self):
+        conn = sqlite3.connect(app_module._settings["database_path"])
+        try:
+            return sorted(conn.execute("SELECT id, diagram_name, content_text FROM diagrams"))
+        finally:
+            conn.close()
+
+    def _whoosh_ids(self):
+        ix = open_dir(app_module._settings["index_directory"])
+        with ix.searcher() as searcher:
+            return sorted(fields["id"] for fields in searcher.all_stored_fields())
+
+    def _assert_db_matches_whoosh(self):
+        assert sorted(str(row[0]) for row in self._db_rows()) == self._whoosh_ids()
+
+    def test_unchanged_run_indexes_nothing(self):
+        self._write_meta("orders", "orders.png", "order flow")
+        self._write_drawio("payments", "billing service")
+        self._write_meta("payments", "payments.png")
+
+        assert app_module.index_all_diagrams() == 2
+        assert app_module.index_all_diagrams(incremental=True) == 0
+        assert len(self._db_rows()) == 2
+        self._assert_db_matches_whoosh()
+
+    def test_edited_file_replaces_its_diagrams(self):
+        self._write_meta("orders", "orders.png", "order flow")
+        self._write_meta("payments", "payments.png", "old text")
+        app_module.index_all_diagrams()
+
+        self._write_meta("payments", "payments.png", "new text")
+        assert app_module.index_all_diagrams(incremental=True) == 1
+
+        rows = self._db_rows()
+        assert [(name, text) for _, name, text in rows] == [
+            ("orders", "order flow"), ("payments", "new text")]
+        self._assert_db_matches_whoosh()
+
+    def test_edited_drawio_reindexes_its_metadata_file(self):
+        self._write_drawio("payments", "billing v1")
+        self._write_meta("payments", "payments.png")
+        app_module.index_all_diagrams()
+
+        self._write_drawio("payments", "billing v2")
+        assert app_module.index_all_diagrams(incremental=True) == 1
+        assert [text for _, _, text in self._db_rows()] == ["billing v2"]
+        self._assert_db_matches_whoosh()
+
+    def test_deleted_metadata_file_is_removed(self):
+        self._write_meta("orders", "orders.png", "order flow")
+        payments = self._write_meta("payments", "payments.png", "billing")
+        app_module.index_all_diagrams()
+
+        os.remove(payments)
+        assert app_module.index_all_diagrams(incremental=True) == 0
+        assert [name for _, name, _ in self._db_rows()] == ["orders"]
+        self._assert_db_matches_whoosh()
+
+    def test_failed_record_is_retried_next_run(self):
+        self._write_meta("orders", "orders.png", "order flow")
+        self._write_drawio("payments", "billing service")
+        self._write_meta("payments", "payments.png")
+
+        extract = app_module.extract_text_from_drawio
+
+        def failing_extract(filepath):
+            raise IOError("unreadable")
+
+        app_module.extract_text_from_drawio = failing_extract
+        try:
+            assert app_module.index_all_diagrams() == 1
+        finally:
+            app_module.extract_text_from_drawio = extract
+
+        # The failed file kept no hash, so it is picked up again unchanged
+        assert app_module.index_all_diagrams(incremental=True) == 1
+        assert app_module.index_all_diagrams(incremental=True) == 0
+        assert [name for _, name, _ in self._db_rows()] == ["orders", "payments"]
+        self._assert_db_matches_whoosh()
+
+    def test_jsonl_later_record_wins(self):
+        path = os.path.join(self.metadata_dir, "OPS", "lucidchart.jsonl")
+        with open(path, "w") as f:
+            f.write(json.dumps({"title": "flow.png", "body_text": "first"}) + "\n")
+            f.write(json.dumps({"title": "other.png", "body_text": "other"}) + "\n")
+            f.write(json.dumps({"title": "flow.png", "body_text": "second"}) + "\n")
+
+        assert app_module.index_all_diagrams() == 2
+        assert [(name, text) for _, name, text in self._db_rows()] == [
+            ("flow", "second"), ("other", "other")]
+
+        with open(path, "a") as f:
+            f.write(json.dumps({"title": "flow.png", "body_text": "third"}) + "\n")
+        assert app_module.index_all_diagrams(incremental=True) == 2
+        assert sorted((name, text) for _, name, text in self._db_rows()) == [
+            ("flow", "third"), ("other", "other")]
+        self._assert_db_matches_whoosh()
@@ -8,15 +8,45 @@ Saves .drawio files, .png renders, and metadata JSON.
 import os
 import re
 import json
-import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from urllib3.exceptions import InsecureRequestWarning
 from .config import Settings
+from .rate_limiter import TokenBucket
+from .http_session import create_session, response_json
+
+# Fast JSON for metadata files (optional, falls back to json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
 
 # Suppress SSL warnings for internal Confluence instances
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
 
+# Threads writing metadata JSON files in the background
+METADATA_WRITER_THREADS = 4
+
+
+def _write_json_atomic(path, data):
+    """Write JSON via a temp file so readers never see a half-written file."""
+    tmp_path = path + '.tmp'
+    try:
+        # Compact: these files are only ever read back by the indexer
+        if ORJSON_AVAILABLE:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(data))
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: Could not write {path}: {e}")
+
+
 class ConfluenceExtractor:
     """Extract DrawIO diagrams from Confluence."""
 
@@ -33,18 +63,26 @@ class ConfluenceExtractor:
         self.batch_size = settings['batch_size']
         self.skip_personal = settings['skip_personal_spaces']
 
-        self._last_request_time = 0
+        self._rate_limiter = TokenBucket(self.rate_limit)
+        self._session = create_session(self.auth)
+        self._io_pool = None
 
     def _rate_limited_request(self, url, stream=False):
-        """Make a rate-limited request."""
-        # Enforce rate limit
-        elapsed = time.time() - self._last_request_time
-        min_interval = 1.0 / self.rate_limit
-        if elapsed < min_interval:
-            time.sleep(min_interval - elapsed)
-
-        self._last_request_time = time.time()
-        return requests.get(url, auth=self.auth, stream=stream, verify=False)
+        """Make a rate-limited request over the pooled keep-alive session."""
+        self._rate_limiter.acquire()
+        return self._session.get(url, stream=stream)
+
+    def _write_metadata(self, meta_path, metadata):
+        """Queue a metadata file write so it overlaps the next download."""
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=METADATA_WRITER_THREADS)
+        self._io_pool.submit(_write_json_atomic, meta_path, metadata)
+
+    def _wait_for_writes(self):
+        """Block until all queued metadata writes are on disk."""
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=True)
+            self._io_pool = None
 
     def _ensure_directories(self, space_key):
         """Create output directories for a space."""
@@ -70,7 +108,7 @@ class ConfluenceExtractor:
             if response.status_code != 200:
                 raise Exception(f"Failed to get spaces: {response.status_code}")
 
-            data = response.json()
+            data = response_json(response)
             results = data.get('results', [])
 
             if not results:
@@ -111,7 +149,7 @@ class ConfluenceExtractor:
                 print(f"Warning: Failed to search {space_key}: {response.status_code}")
                 break
 
-            results = response.json().get('results', [])
+            results = response_json(response).get('results', [])
 
             if not results:
                 break
@@ -137,7 +175,7 @@ class ConfluenceExtractor:
             if response.status_code != 200:
                 break
 
-            results = response.json().get('results', [])
+            results = response_json(response).get('results', [])
 
             if not results:
                 break
@@ -202,16 +240,16 @@ class ConfluenceExtractor:
             # Download PNG render
             if png_attachment:
                 png_url = self.confluence_url + png_attachment['_links']['download']
-                response = self._rate_limited_request(png_url, stream=True)
-
-                if response.status_code == 200:
-                    # Clean filename (remove tabs and other problematic chars)
-                    safe_name = diagram_name.replace('\t', '').replace('/', '_')
-                    png_path = os.path.join(dirs['images'], f"{safe_name}.png")
+                # Closing the response returns its connection to the pool
+                with self._rate_limited_request(png_url, stream=True) as response:
+                    if response.status_code == 200:
+                        # Clean filename (remove tabs and other problematic chars)
+                        safe_name = diagram_name.replace('\t', '').replace('/', '_')
+                        png_path = os.path.join(dirs['images'], f"{safe_name}.png")
 
-                    with open(png_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
+                        with open(png_path, 'wb') as f:
+                            for chunk in response.iter_content(chunk_size=8192):
+                                f.write(chunk)
 
                 # Save metadata
                 metadata = dict(png_attachment)
@@ -219,23 +257,21 @@ class ConfluenceExtractor:
                 metadata['diagramWidth'] = diagram_width
 
                 meta_path = os.path.join(dirs['metadata'], f"{safe_name}.png.json")
-                with open(meta_path, 'w', encoding='utf-8') as f:
-                    json.dump(metadata, f, indent=2)
+                self._write_metadata(meta_path, metadata)
 
             # Download .drawio file
             if drawio_attachment:
                 drawio_url = self.confluence_url + drawio_attachment['_links']['download']
-                response = self._rate_limited_request(drawio_url, stream=True)
-
-                if response.status_code == 200:
-                    safe_name = diagram_name.replace('\t', '').replace('/', '_')
-                    drawio_path = os.path.join(dirs['diagrams'], f"{safe_name}.drawio")
+                with self._rate_limited_request(drawio_url, stream=True) as response:
+                    if response.status_code == 200:
+                        safe_name = diagram_name.replace('\t', '').replace('/', '_')
+                        drawio_path = os.path.join(dirs['diagrams'], f"{safe_name}.drawio")
 
-                    with open(drawio_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
+                        with open(drawio_path, 'wb') as f:
+                            for chunk in response.iter_content(chunk_size=8192):
+                                f.write(chunk)
 
-                    downloaded += 1
+                        downloaded += 1
 
         return downloaded
 
@@ -256,13 +292,17 @@ class ConfluenceExtractor:
         pages = self.get_pages_with_drawio(space_key)
         total_diagrams = 0
 
-        for idx, page in enumerate(pages):
-            if progress_callback:
-                progress_callback(idx + 1, len(pages), page.get('title', ''))
+        try:
+            for idx, page in enumerate(pages):
+                if progress_callback:
+                    progress_callback(idx + 1, len(pages), page.get('title', ''))
 
-            attachments = self.get_page_attachments(page['id'])
-            count = self.download_diagram(page, attachments, space_key, dirs, dry_run)
-            total_diagrams += count
+                attachments = self.get_page_attachments(page['id'])
+                count = self.download_diagram(page, attachments, space_key, dirs, dry_run)
+                total_diagrams += count
+        finally:
+            # The space's metadata is complete once extract_space returns
+            self._wait_for_writes()
 
         return total_diagrams
 
@@ -0,0 +1,58 @@
+"""
+Pooled requests sessions for Confluence REST calls.
+
+One keep-alive session per extractor avoids a fresh TCP/TLS handshake for
+every paginated request. Transient gateway/throttling responses are retried
+with backoff (honouring Retry-After); other statuses are returned to the
+caller unchanged so existing status_code checks still apply. Large search
+responses are parsed with orjson when it is installed.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Fast JSON parsing for large search responses (optional, falls back to json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+def create_session(auth, pool_maxsize=20):
+    """
+    Create a requests Session for an internal Confluence instance.
+
+    Args:
+        auth: (username, password) tuple for basic auth
+        pool_maxsize: Max pooled connections per host
+
+    Returns:
+        requests.Session
+    """
+    session = requests.Session()
+    session.auth = auth
+    session.verify = False  # Internal instances commonly use self-signed certs
+
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET'}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def response_json(response):
+    """Parse a requests/httpx response body as JSON, with orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return response.json()
@@ -15,6 +15,7 @@ Usage:
     python -m extractor.lucidchart_screenshotter --spaces SPACE1,SPACE2
     python -m extractor.lucidchart_screenshotter --test  # First 5 pages only
     python -m extractor.lucidchart_screenshotter --dry-run
+    python -m extractor.lucidchart_screenshotter --workers 4  # 4 browsers in parallel
 """
 
 import os
@@ -24,7 +25,14 @@ import time
 import hashlib
 import argparse
 import sys
+import shutil
 import logging
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
 
 # Setup logging
 logging.basicConfig(
@@ -53,17 +61,46 @@ except ImportError:
     pytesseract = None
     Image = None
 
+# HTTP/2 client for Confluence REST calls (optional, falls back to requests)
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    httpx = None
+
+# Single-pass HTML parsing for body text (optional, falls back to regex)
+try:
+    from lxml import etree as lxml_etree, html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+    lxml_etree = lxml_html = None
+
+# Fast JSON for metadata records (optional, falls back to json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
 import requests
 from urllib3.exceptions import InsecureRequestWarning
+from urllib.parse import urlparse
 
 # Handle imports for both module and script execution
 try:
     from .config import Settings
+    from .rate_limiter import TokenBucket
+    from .http_session import create_session, response_json
 except ImportError:
     # Running as script - add parent directory to path
     import sys
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from extractor.config import Settings
+    from extractor.rate_limiter import TokenBucket
+    from extractor.http_session import create_session, response_json
 
 
 def check_playwright_installed():
@@ -87,12 +124,382 @@ def check_playwright_installed():
 # Suppress SSL warnings
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
+# Describe every element matched by a selector in one browser round trip
+_ELEMENT_INFO_JS = """els => els.map(e => {
+    const r = e.getBoundingClientRect();
+    const frame = e.tagName === 'IFRAME' ? e : e.querySelector('iframe[src*="lucid"]');
+    return {
+        tag: e.tagName, x: r.x, y: r.y, width: r.width, height: r.height,
+        src: (frame && frame.getAttribute('src')) || '',
+        docId: e.getAttribute('data-lucid-document-id') || '',
+    };
+})"""
+
+# _ELEMENT_INFO_JS for every selector's matches at once (one list per selector)
+_MATCH_INFO_JS = f"sels => sels.map(s => ({_ELEMENT_INFO_JS})(Array.from(document.querySelectorAll(s))))"
+
+# Scroll an element into view and return its new viewport box (one round trip)
+_SCROLL_INTO_VIEW_JS = """el => {
+    if (el.scrollIntoViewIfNeeded) el.scrollIntoViewIfNeeded(true); else el.scrollIntoView({block: 'center'});
+    const r = el.getBoundingClientRect();
+    return {x: r.x, y: r.y, width: r.width, height: r.height};
+}"""
+
+# First visible match of a list of button selectors, looked up inside the
+# element (when given) and then the whole document, selector by selector.
+# Returns [selector index, found inside element] or null.
+_MAXIMIZE_BUTTON_JS = """(el, sels) => {
+    const scopes = el ? [el, document] : [document];
+    for (let i = 0; i < sels.length; i++) {
+        for (const scope of scopes) {
+            let b = null;
+            try { b = scope.querySelector(sels[i]); } catch (e) { break; }
+            if (!b) continue;
+            const r = b.getBoundingClientRect();
+            if (r.width > 0 && r.height > 0 && getComputedStyle(b).visibility !== 'hidden') return [i, scope === el];
+        }
+    }
+    return null;
+}"""
+
+# Resource types never needed for a capture, unless served by Lucidchart
+BLOCKED_RESOURCE_TYPES = frozenset({'font', 'media'})
+# Also skipped with --block-assets (Confluence-hosted static renders are lost)
+BLOCKED_ASSET_TYPES = frozenset({'image'})
+_LUCID_HOST_RE = re.compile(r'(^|\.)(lucid\.app|lucidchart\.com|lucid\.co)$')
+# Analytics/tracking hosts, and Confluence's own analytics endpoint
+_TRACKER_HOST_RE = re.compile(
+    r'(^|\.)(google-analytics\.com|googletagmanager\.com|doubleclick\.net|'
+    r'newrelic\.com|nr-data\.net|hotjar\.com|segment\.(io|com))$'
+)
+_TRACKER_PATH_PREFIX = '/rest/analytics/'
+
+# Browser viewport used for all captures
+VIEWPORT = {'width': 1920, 'height': 1080}
+
+# Saved browser sessions older than this are not worth validating (seconds)
+AUTH_STATE_MAX_AGE = 12 * 3600
+
+# Embeds no larger than this (px, either side) are icons/placeholders, not diagrams
+MIN_DIAGRAM_SIZE = 50
+
+
+def _is_diagram_sized(box):
+    """Whether a bounding box is big enough to be worth capturing."""
+    return box['width'] > MIN_DIAGRAM_SIZE and box['height'] > MIN_DIAGRAM_SIZE
+
+
+def _fits_viewport(box):
+    """Whether a viewport-relative box is entirely visible (so a clip captures all of it)."""
+    return (box['x'] >= 0 and box['y'] >= 0
+            and box['x'] + box['width'] <= VIEWPORT['width']
+            and box['y'] + box['height'] <= VIEWPORT['height'])
+
+
+# Comprehensive list of selectors to try, in order of preference
+# Lucidchart embeds can be iframes, divs, or img tags depending on Confluence version
+LUCID_SELECTORS = [
+    # Direct iframe selectors (also covers src*="lucidchart" / "app.lucid")
+    'iframe[src*="lucid"]',
+    # Confluence macro containers
+    '[data-macro-name="lucidchart"]',
+    '.lucidchart-macro',
+    # Embedded image fallbacks (static renders)
+    'img[data-macro-name="lucidchart"]',
+    '.confluence-embedded-image[alt*="lucid" i]',
+    # Generic embed containers
+    '.embedded-macro[data-macro-name="lucidchart"]',
+    '.wysiwyg-macro[data-macro-name="lucidchart"]',
+    # Wrapper divs
+    '.lucidchart-wrapper',
+    '.lucid-embed',
+    'div[data-lucid-document-id]',
+]
+
+# Any of these attached means the page's Lucidchart embeds have been rendered into the DOM
+LUCID_READY_SELECTOR = ('iframe[src*="lucid"], [data-macro-name="lucidchart"], '
+                        '.lucidchart-macro, div[data-lucid-document-id]')
+
+# Main content containers for the fullpage fallback, in order of preference
+CONTENT_SELECTORS = ['#main-content', '.wiki-content', '#content-body', '#content', 'article']
+
+# Selector of the first preferred content container larger than 100x100
+_CONTENT_AREA_JS = """sels => sels.find(sel => {
+    const e = document.querySelector(sel);
+    if (!e) return false;
+    const r = e.getBoundingClientRect();
+    return r.width > 100 && r.height > 100;
+}) || null"""
+
+# Lucidchart document id in an embed URL, e.g. https://lucid.app/documents/embeddedchart/<uuid>
+_LUCID_DOC_ID_RE = re.compile(r'/documents/(?:[a-z]+/)?([0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12})')
+LUCIDCHART_PREVIEW_URL = '{origin}/documents/{doc_id}/preview?page=0'
+# Preview content types saved by --direct-fetch; anything else falls back to a screenshot
+LUCIDCHART_PREVIEW_TYPES = {'image/png': '.png', 'image/jpeg': '.jpg'}
+
+# Collect everything _dump_page_structure logs in one browser round trip
+_PAGE_STRUCTURE_JS = """() => {
+    const describe = (sel, fn) => Array.from(document.querySelectorAll(sel)).map(fn);
+    return {
+        iframes: describe('iframe', e => ({
+            src: e.getAttribute('src') || '(no src)',
+            cls: e.getAttribute('class') || '(no class)',
+        })),
+        lucid: describe('[class*="lucid"], [id*="lucid"], [data-macro-name*="lucid"]', e => ({
+            tag: e.tagName,
+            cls: e.getAttribute('class') || '',
+            id: e.getAttribute('id') || '',
+        })),
+        macros: describe('[data-macro-name]', e => ({
+            tag: e.tagName,
+            macro: e.getAttribute('data-macro-name') || '',
+        })),
+    };
+}"""
+
+# Per-space metadata file: one JSON record per captured diagram
+METADATA_JSONL = 'diagrams.jsonl'
+
+# Search results requested per batch, and concurrent batch fetches once the total is known
+SEARCH_PAGE_SIZE = 100
+SEARCH_FETCH_THREADS = 4
+METADATA_BUFFER_SIZE = 64 * 1024
+
+# Pages recorded between page cache writes (it is also written after each space)
+PAGE_CACHE_SAVE_INTERVAL = 25
+
+# Tokens needed to pull Lucidchart documentName parameters out of storage XML:
+# macro open tag (group 1 = attributes), documentName parameter (group 2), macro close tag
+_STORAGE_TOKEN_RE = re.compile(
+    r'<ac:structured-macro\b([^>]*)>'
+    r'|<ac:parameter\s+ac:name="documentName"[^>]*>([^<]+)</ac:parameter>'
+    r'|</ac:structured-macro>',
+    re.IGNORECASE
+)
+
+# Macro parameter values in storage format (ids, sizes, names) - not page text
+_MACRO_PARAM_RE = re.compile(r'<ac:parameter\b[^>]*>.*?</ac:parameter>', re.DOTALL)
+
+# Characters not allowed in output filenames
+_SAFE_NAME_RE = re.compile(r'[^\w\s-]')
+
+
+def _content_hash(page_info):
+    """Hash of a page's text, diagram names and macro parameters, for change detection."""
+    content = '\0'.join((
+        page_info.body_text,
+        '\0'.join(name or '' for name in page_info.diagram_names),
+        '\0'.join(page_info.macro_params),
+    ))
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _json_line(record):
+    """Serialize a metadata record as one compact JSONL line (bytes)."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(record) + b'\n'
+    return json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def _read_jsonl(path):
+    """Read a metadata JSONL file's records, skipping malformed lines (e.g. one cut off by a kill)."""
+    records = []
+    if not os.path.exists(path):
+        return records
+    loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+    with open(path, 'rb') as f:
+        for line_num, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(loads(line))
+            except ValueError:
+                logger.warning(f"Skipping malformed line {line_num} in {path}")
+    return records
+
+
+def _compact_jsonl(path):
+    """
+    Rewrite a metadata JSONL file with one record per title.
+
+    Recaptures (new page versions, --force) append a newer record for the same
+    image; readers take the last one, so only that one is kept.
+    """
+    records = {}
+    for record in _read_jsonl(path):
+        records[record.get('title', '')] = record
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for record in records.values():
+            f.write(_json_line(record))
+    os.replace(tmp_path, path)
+
+
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style)[^>]*>.*?</\1>', re.DOTALL | re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _html_to_text(html):
+    """
+    Get the visible text of an HTML fragment, tags replaced by spaces.
+
+    Uses one lxml parse (script/style/comments dropped, all entities
+    decoded) when available, otherwise regex stripping.
+    """
+    if LXML_AVAILABLE:
+        try:
+            root = lxml_html.fromstring(html)
+            lxml_etree.strip_elements(root, 'script', 'style', lxml_etree.Comment, with_tail=False)
+            return ' '.join(' '.join(root.itertext()).split())
+        except (lxml_etree.ParserError, ValueError):
+            pass  # Empty or unparseable fragment
+
+    text = _TAG_RE.sub(' ', _SCRIPT_STYLE_RE.sub('', html))
+    text = (text.replace('&nbsp;', ' ').replace('&lt;', '<').replace('&gt;', '>')
+            .replace('&quot;', '"').replace('&amp;', '&'))
+    return ' '.join(text.split())
+
+
+@lru_cache(maxsize=1)
+def _load_stopwords():
+    """Load stopwords from file if it exists (once per process)."""
+    stopwords_path = os.path.join(os.path.dirname(__file__), 'stopwords.txt')
+    if os.path.exists(stopwords_path):
+        # One read, lowercased once; each line stripped once
+        with open(stopwords_path, 'r', encoding='utf-8') as f:
+            lines = (line.strip() for line in f.read().lower().splitlines())
+            return frozenset(line for line in lines if line and not line.startswith('#'))
+    # Default common stopwords
+    return frozenset({
+        'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from',
+        'has', 'he', 'in', 'is', 'it', 'its', 'of', 'on', 'or', 'that',
+        'the', 'to', 'was', 'were', 'will', 'with', 'this', 'but', 'they',
+        'have', 'had', 'what', 'when', 'where', 'who', 'which', 'why', 'how',
+        'all', 'each', 'every', 'both', 'few', 'more', 'most', 'other',
+        'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so',
+        'than', 'too', 'very', 'can', 'just', 'should', 'now', 'also',
+        'your', 'our', 'their', 'my', 'his', 'her', 'we', 'you', 'i', 'me',
+        'nbsp', 'amp', 'quot', 'lt', 'gt', 'br', 'div', 'span', 'class', 'id',
+        'href', 'src', 'style', 'http', 'https', 'www', 'com', 'org', 'net',
+        'page', 'content', 'confluence', 'wiki', 'display', 'spaces',
+    })
+
+
+# Threads writing screenshot bytes to disk, per browser
+IMAGE_WRITER_THREADS = 4
+
+
+def _write_image(image_path, data):
+    """Write screenshot bytes to disk (runs on the image writer pool)."""
+    try:
+        with open(image_path, 'wb') as f:
+            f.write(data)
+    except OSError as e:
+        logger.warning(f"    Could not save {image_path}: {e}")
+
+
+def _lucid_doc_id(info):
+    """Lucidchart document id of an embed, from its iframe src or data attribute."""
+    match = _LUCID_DOC_ID_RE.search(info.get('src', ''))
+    return match.group(1) if match else info.get('docId', '')
+
+
+@lru_cache(maxsize=4096)
+def _sanitize_name(name, maxlen):
+    """Strip filename-unsafe characters from a name and truncate it to maxlen."""
+    return _SAFE_NAME_RE.sub('', name).strip()[:maxlen]
+
+
+@dataclass(slots=True)
+class PageInfo:
+    """A Confluence page containing Lucidchart macros, as returned by search."""
+    id: str
+    title: str
+    space_key: str
+    link: str = ''
+    version: Optional[int] = None
+    diagram_names: Tuple[Optional[str], ...] = ()
+    body_text: str = ''
+    macro_params: Tuple[str, ...] = ()  # Raw <ac:parameter> elements (documentId, page, size...)
+
+
+# Longest image edge (pixels) passed to Tesseract
+OCR_MAX_DIMENSION = 2000
+
+
+def _ocr_one(image_path):
+    """
+    Extract text from a single image using OCR.
+
+    Module-level so it can be pickled into a worker process.
+
+    Args:
+        image_path: Path to the image file
+
+    Returns:
+        str: Extracted text, or empty string if OCR fails/unavailable
+    """
+    if not OCR_AVAILABLE:
+        return ''
+
+    try:
+        # Open the image
+        image = Image.open(image_path)
+
+        # Tesseract cost scales with pixel count and accuracy plateaus well below
+        # the size of maximized captures, so shrink the long edge first
+        if max(image.size) > OCR_MAX_DIMENSION:
+            image.thumbnail((OCR_MAX_DIMENSION, OCR_MAX_DIMENSION), Image.LANCZOS)
+
+        # Tesseract works on a single channel internally
+        image = image.convert('L')
+
+        # Run OCR with Tesseract
+        # Use config for better accuracy on diagrams
+        custom_config = r'--oem 3 --psm 6'
+        text = pytesseract.image_to_string(image, config=custom_config)
+
+        # Clean up the extracted text
+        # Remove excessive whitespace while preserving some structure
+        lines = [line.strip() for line in text.split('\n') if line.strip()]
+        cleaned_text = ' '.join(lines)
+
+        # Filter out very short results (likely noise)
+        if len(cleaned_text) < 10:
+            return ''
+
+        return cleaned_text
+
+    except Exception as e:
+        logger.warning(f"    OCR failed for {image_path}: {e}")
+        return ''
+
 
 class LucidchartScreenshotter:
     """Screenshot Lucidchart diagrams from Confluence using Playwright."""
 
-    def __init__(self, settings=None):
-        """Initialize with settings."""
+    def __init__(self, settings=None, image_format='png', image_quality=85, block_assets=False,
+                 tabs=2, require_macro=False, force=False, direct_fetch=False):
+        """
+        Initialize with settings.
+
+        Args:
+            settings: Settings dict (defaults to Settings.get())
+            image_format: 'png' (default; lossless, transparent background) or
+                'jpeg' (several times smaller, faster to encode)
+            image_quality: JPEG quality 0-100 (ignored for PNG)
+            block_assets: Don't load Confluence images or page scripts from
+                other hosts either (fonts, media and trackers are always
+                skipped; Lucidchart's own assets still load)
+            tabs: Browser tabs per worker; extras preload upcoming pages
+            require_macro: Skip search hits whose storage format has no
+                Lucidchart macro instead of visiting them for a fullpage capture
+            force: Recapture every page, ignoring the page cache and images
+                left by earlier runs
+            direct_fetch: Try downloading each diagram's rendered preview from
+                Lucidchart before screenshotting it (an undocumented endpoint;
+                an origin that fails once is not tried again this run)
+        """
         if settings is None:
             settings = Settings.get()
         self.settings = settings
@@ -102,69 +509,123 @@ class LucidchartScreenshotter:
         self.content_dir = settings['content_directory']
         self.rate_limit = settings['rate_limit']
         self.skip_personal = settings['skip_personal_spaces']
-
-        self._last_request_time = 0
+        self.image_format = image_format
+        self.image_quality = image_quality
+        self._image_ext = '.jpg' if image_format == 'jpeg' else '.png'
+        self.block_assets = block_assets
+        self._blocked_types = BLOCKED_RESOURCE_TYPES | BLOCKED_ASSET_TYPES if block_assets else BLOCKED_RESOURCE_TYPES
+        self._confluence_host = urlparse(self.confluence_url).hostname or ''
+        self.tabs = max(1, tabs)
+        self.require_macro = require_macro
+        self.force = force
+        self.direct_fetch = direct_fetch
+        self._failed_fetch_origins = set()  # Lucidchart origins whose preview fetch failed
+
+        self._rate_limiter = TokenBucket(self.rate_limit)
+        self._http = None
+        self._image_writer = None
+        self.headless = True
+        self._playwright = None
         self._browser = None
         self._context = None
         self._page = None
+        self._prefetched = {}  # page_id -> tab already loading that page
+        self._free_tabs = []  # Idle tabs available for prefetching
+        self._captured = []  # (png_path, jsonl_path, title) awaiting OCR
+        self._metadata_files = []  # Open per-space JSONL handles
+        self._dirs_cache = {}  # space_key -> dirs dict from _ensure_directories
+        self._diagram_cache = {}  # Lucid document id -> (image path, pending write) of first capture
+
+        # Page version cache: {page_id: {'version': n, 'images': [filenames]}}
+        self._page_cache_path = os.path.join(self.content_dir, '.lucidchart_cache.json')
+        self._page_cache = None
+        self._page_cache_lock = threading.Lock()
+        self._page_cache_dirty = 0  # Pages this instance recorded since the last write
+        self._browser_init_lock = threading.Lock()
+
+        # Spaces fully processed by earlier runs (used by --resume)
+        self._completed_spaces_path = os.path.join(self.content_dir, '.completed_spaces.json')
+        self._completed_spaces = None
+        self._completed_spaces_lock = threading.Lock()
+
+        # Saved browser login (cookies/local storage) reused across runs
+        self._auth_state_path = os.path.join(self.content_dir, '.auth_state.json')
+
+    def _screenshot_options(self):
+        """Build Playwright screenshot() kwargs for the configured image format."""
+        if self.image_format == 'jpeg':
+            return {'type': 'jpeg', 'quality': self.image_quality}
+        # Drop the default white page background so PNGs stay small
+        return {'type': 'png', 'omit_background': True}
+
+    def _capture(self, target, image_path, **kwargs):
+        """
+        Screenshot a page or element and write the image in the background.
 
-    def _rate_limited_request(self, url):
+        The browser only produces the bytes; disk writes run on a small thread
+        pool so the next screenshot or navigation can start straight away.
+
+        Returns:
+            Future that completes once the image is on disk
+        """
+        data = target.screenshot(**kwargs, **self._screenshot_options())
+        if self._image_writer is None:
+            self._image_writer = ThreadPoolExecutor(max_workers=IMAGE_WRITER_THREADS)
+        return self._image_writer.submit(_write_image, image_path, data)
+
+    def _close_image_writer(self):
+        """Wait for pending image writes to finish."""
+        if self._image_writer is not None:
+            self._image_writer.shutdown(wait=True)
+            self._image_writer = None
+
+    def _get_http_client(self):
+        """
+        Get the persistent HTTP client for Confluence REST calls.
+
+        Uses httpx with HTTP/2 when available so paginated GETs share one
+        multiplexed connection; otherwise a keep-alive requests.Session.
+        """
+        if self._http is None:
+            if HTTPX_AVAILABLE:
+                options = dict(
+                    auth=self.auth,
+                    verify=False,
+                    timeout=30.0,
+                    limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+                )
+                try:
+                    self._http = httpx.Client(http2=True, **options)
+                except ImportError:
+                    # http2=True needs the 'h2' package (pip install httpx[http2])
+                    logger.debug("h2 not installed, using HTTP/1.1")
+                    self._http = httpx.Client(**options)
+            else:
+                self._http = create_session(self.auth)
+        return self._http
+
+    def _close_http_client(self):
+        """Close the HTTP client and its pooled connections."""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+
+    def _rate_limited_request(self, url, params=None):
         """Make a rate-limited API request."""
-        elapsed = time.time() - self._last_request_time
-        min_interval = 1.0 / self.rate_limit
-        if elapsed < min_interval:
-            time.sleep(min_interval - elapsed)
-
-        self._last_request_time = time.time()
-        return requests.get(url, auth=self.auth, verify=False)
-
-    def _load_stopwords(self):
-        """Load stopwords from file if it exists."""
-        stopwords_path = os.path.join(os.path.dirname(__file__), 'stopwords.txt')
-        if os.path.exists(stopwords_path):
-            with open(stopwords_path, 'r', encoding='utf-8') as f:
-                return set(line.strip().lower() for line in f if line.strip() and not line.startswith('#'))
-        # Default common stopwords
-        return {
-            'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from',
-            'has', 'he', 'in', 'is', 'it', 'its', 'of', 'on', 'or', 'that',
-            'the', 'to', 'was', 'were', 'will', 'with', 'this', 'but', 'they',
-            'have', 'had', 'what', 'when', 'where', 'who', 'which', 'why', 'how',
-            'all', 'each', 'every', 'both', 'few', 'more', 'most', 'other',
-            'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so',
-            'than', 'too', 'very', 'can', 'just', 'should', 'now', 'also',
-            'your', 'our', 'their', 'my', 'his', 'her', 'we', 'you', 'i', 'me',
-            'nbsp', 'amp', 'quot', 'lt', 'gt', 'br', 'div', 'span', 'class', 'id',
-            'href', 'src', 'style', 'http', 'https', 'www', 'com', 'org', 'net',
-            'page', 'content', 'confluence', 'wiki', 'display', 'spaces',
-        }
+        self._rate_limiter.acquire()
+        return self._get_http_client().get(url, params=params)
 
     def _extract_text_from_html(self, html):
         """Extract plain text from HTML, filtering stopwords for search indexing."""
         if not html:
             return ''
 
-        # Remove script and style elements
-        html = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
-        html = re.sub(r'<style[^>]*>.*?</style>', '', html, flags=re.DOTALL | re.IGNORECASE)
-
-        # Remove HTML tags
-        text = re.sub(r'<[^>]+>', ' ', html)
-
-        # Decode HTML entities
-        text = text.replace('&nbsp;', ' ')
-        text = text.replace('&amp;', '&')
-        text = text.replace('&lt;', '<')
-        text = text.replace('&gt;', '>')
-        text = text.replace('&quot;', '"')
-
-        # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-
         # Filter stopwords for better search indexing
-        stopwords = self._load_stopwords()
-        words = text.split()
-        filtered_words = [w for w in words if w.lower() not in stopwords and len(w) > 2]
+        stopwords = _load_stopwords()
+        text = _html_to_text(html)
+        # Lowercase once for the lookups; keep original casing for display
+        filtered_words = [w for w, lw in zip(text.split(), text.lower().split())
+                          if len(w) > 2 and lw not in stopwords]
 
         return ' '.join(filtered_words)
 
@@ -184,35 +645,166 @@ class LucidchartScreenshotter:
             return []
 
         names = []
-
-        # Find all lucidchart macros and their documentName parameters
-        # Pattern matches: <ac:parameter ac:name="documentName">NAME</ac:parameter>
-        # Only within lucidchart macro context
-        macro_pattern = r'<ac:structured-macro[^>]*ac:name="lucidchart"[^>]*>(.*?)</ac:structured-macro>'
-        param_pattern = r'<ac:parameter\s+ac:name="documentName"[^>]*>([^<]+)</ac:parameter>'
-
-        for macro_match in re.finditer(macro_pattern, storage_xml, re.DOTALL | re.IGNORECASE):
-            macro_content = macro_match.group(1)
-            param_match = re.search(param_pattern, macro_content, re.IGNORECASE)
-            if param_match:
-                name = param_match.group(1).strip()
-                if name:
-                    names.append(name)
-            else:
-                names.append(None)  # No name found for this macro
+        # One entry per open macro: index into names for lucidchart macros, None otherwise
+        open_macros = []
+
+        # Single linear scan over macro open/close tags and documentName parameters
+        for match in _STORAGE_TOKEN_RE.finditer(storage_xml):
+            attrs, document_name = match.group(1), match.group(2)
+
+            if attrs is not None:
+                slot = None
+                if 'ac:name="lucidchart"' in attrs.lower():
+                    names.append(None)  # Filled in if a documentName follows
+                    slot = len(names) - 1
+                if not attrs.rstrip().endswith('/'):
+                    open_macros.append(slot)
+            elif document_name is not None:
+                # Parameter belongs to the innermost enclosing macro
+                if open_macros and open_macros[-1] is not None:
+                    slot = open_macros[-1]
+                    if names[slot] is None and document_name.strip():
+                        names[slot] = document_name.strip()
+            elif open_macros:
+                open_macros.pop()
 
         return names
 
+    def _get_page_cache(self):
+        """Load the page version cache from disk (once per run)."""
+        if self._page_cache is None:
+            self._page_cache = {}
+            if os.path.exists(self._page_cache_path):
+                try:
+                    with open(self._page_cache_path, 'r', encoding='utf-8') as f:
+                        self._page_cache = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring unreadable page cache {self._page_cache_path}: {e}")
+        return self._page_cache
+
+    def _save_page_cache(self):
+        """Persist the page version cache via a temp file so a kill can't truncate it."""
+        os.makedirs(self.content_dir, exist_ok=True)
+        cache = self._get_page_cache()
+        with self._page_cache_lock:
+            tmp_path = self._page_cache_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, self._page_cache_path)
+        self._page_cache_dirty = 0
+
+    def _flush_page_cache(self):
+        """Write the page cache if this instance recorded pages since the last write."""
+        if self._page_cache_dirty:
+            self._save_page_cache()
+
+    def _update_page_cache(self, page_info, images):
+        """
+        Record the captured images for a page version.
+
+        The cache is written every PAGE_CACHE_SAVE_INTERVAL pages rather than
+        per page; pages recorded after a crash's last write are just recaptured.
+        """
+        cache = self._get_page_cache()
+        with self._page_cache_lock:
+            cache[str(page_info.id)] = {
+                'version': page_info.version,
+                'content_hash': _content_hash(page_info),
+                'images': images,
+            }
+        self._page_cache_dirty += 1
+        if self._page_cache_dirty >= PAGE_CACHE_SAVE_INTERVAL:
+            self._save_page_cache()
+
+    def _is_page_unchanged(self, page_info, dirs):
+        """
+        Check whether a page was captured at its current version on a previous run.
+
+        A page also counts as unchanged if its version moved but its text,
+        diagram names and macro parameters hash the same (e.g. a title or label edit).
+
+        Returns:
+            int: Number of cached diagrams if unchanged and all images still exist, else 0
+        """
+        cached = self._get_page_cache().get(str(page_info.id))
+        if not cached or not cached.get('images'):
+            return 0
+
+        same_version = page_info.version is not None and cached.get('version') == page_info.version
+        if not same_version and cached.get('content_hash') != _content_hash(page_info):
+            return 0
+
+        if not dirs['existing'].issuperset(cached['images']):
+            return 0
+        return len(cached['images'])
+
     def _ensure_directories(self, space_key):
-        """Create output directories for a space."""
+        """Create output directories for a space (once per run)."""
+        if space_key in self._dirs_cache:
+            return self._dirs_cache[space_key]
+
         dirs = {
             'images': os.path.join(self.content_dir, 'images', space_key),
             'metadata': os.path.join(self.content_dir, 'metadata', space_key),
         }
         for path in dirs.values():
             os.makedirs(path, exist_ok=True)
+
+        # Image files on disk, listed once so existence checks don't stat per diagram
+        with os.scandir(dirs['images']) as entries:
+            dirs['existing'] = {entry.name for entry in entries if entry.is_file()}
+
+        # All diagrams in a space share one append-only metadata file,
+        # opened on first capture so spaces without captures stay empty
+        dirs['meta_path'] = os.path.join(dirs['metadata'], METADATA_JSONL)
+        dirs['meta_fp'] = None
+        dirs['recorded'] = None  # {page_id: image titles}, loaded by _recorded_images
+
+        # Image path template, so captures skip os.path.join; '{}' is the diagram name
+        dirs['image_tmpl'] = dirs['images'].replace('{', '{{').replace('}', '}}') + os.sep + '{}' + self._image_ext
+        self._dirs_cache[space_key] = dirs
         return dirs
 
+    def _write_metadata(self, dirs, metadata):
+        """
+        Append one diagram's metadata record to the space's JSONL file.
+
+        Records are buffered; _flush_metadata writes them out once per page.
+        """
+        if dirs['meta_fp'] is None:
+            dirs['meta_fp'] = open(dirs['meta_path'], 'ab', buffering=METADATA_BUFFER_SIZE)
+            self._metadata_files.append(dirs['meta_fp'])
+        dirs['meta_fp'].write(_json_line(metadata))
+        if dirs['recorded'] is not None:
+            dirs['recorded'].setdefault(str(metadata['page_id']), set()).add(metadata['title'])
+
+    def _flush_metadata(self, dirs):
+        """Write out the space's buffered metadata records."""
+        if dirs.get('meta_fp') is not None:
+            dirs['meta_fp'].flush()
+
+    def _recorded_images(self, dirs):
+        """Map page id -> image titles that the space's metadata records point to (read once per space)."""
+        if dirs['recorded'] is None:
+            self._flush_metadata(dirs)
+            recorded = {}
+            for record in _read_jsonl(dirs['meta_path']):
+                recorded.setdefault(str(record.get('page_id', '')), set()).add(record.get('title'))
+            dirs['recorded'] = recorded
+        return dirs['recorded']
+
+    def _close_metadata_files(self):
+        """Close all open metadata JSONL handles, compacting the files they appended to."""
+        for fp in self._metadata_files:
+            fp.close()
+            try:
+                _compact_jsonl(fp.name)
+            except OSError as e:
+                logger.warning(f"Could not compact {fp.name}: {e}")
+        self._metadata_files = []
+        # Cached dirs dicts hold the now-closed handles
+        self._dirs_cache = {}
+
     def get_all_spaces(self):
         """
         Get list of all global space keys from Confluence.
@@ -239,7 +831,7 @@ class LucidchartScreenshotter:
                 print(f"Warning: Failed to fetch spaces: {response.status_code}")
                 break
 
-            data = response.json()
+            data = response_json(response)
             results = data.get('results', [])
 
             if not results:
@@ -274,7 +866,7 @@ class LucidchartScreenshotter:
             limit: Optional max number of pages (for testing)
 
         Returns:
-            List of page dicts with id, title, space info
+            List of PageInfo
         """
         pages = []
         start = 0
@@ -291,16 +883,17 @@ class LucidchartScreenshotter:
             print("Searching for Lucidchart pages across all spaces...")
             import sys
 
-        while True:
-            url = (
-                f"{self.confluence_url}/rest/api/content/search"
-                f"?cql={requests.utils.quote(cql)}"
-                f"&start={start}"
-                f"&expand=space,body.view,body.storage,_links"
-            )
-
-            response = self._rate_limited_request(url)
+        # Only 'start' changes between pages; the client encodes the params
+        search_url = f"{self.confluence_url}/rest/api/content/search"
+        base_params = {
+            'cql': cql,
+            'expand': 'space,body.storage,version,_links',
+            'limit': SEARCH_PAGE_SIZE,
+        }
 
+        def fetch(batch_start):
+            """Fetch one batch of search results; None on failure."""
+            response = self._rate_limited_request(search_url, params={**base_params, 'start': batch_start})
             if response.status_code != 200:
                 print(f"Warning: Search failed: {response.status_code}")
                 # Print response body for debugging
@@ -309,18 +902,37 @@ class LucidchartScreenshotter:
                     print(f"  Response: {error_detail}")
                 except:
                     pass
+                return None
+            return response_json(response)
+
+        page_size = SEARCH_PAGE_SIZE
+        prefetched = {}
+
+        while True:
+            data = prefetched.pop(start, None) or fetch(start)
+            if data is None:
                 break
 
-            data = response.json()
             results = data.get('results', [])
 
             if not results:
                 break
 
+            if start == 0:
+                # Confluence may cap expanded searches below the requested limit
+                page_size = data.get('limit') or len(results)
+                # Once the total is known, fetch the remaining batches concurrently
+                # (still throttled by the shared rate limiter)
+                total_size = data.get('totalSize')
+                if not limit and isinstance(total_size, int) and total_size > len(results):
+                    starts = range(len(results), total_size, page_size)
+                    with ThreadPoolExecutor(max_workers=SEARCH_FETCH_THREADS) as executor:
+                        prefetched = dict(zip(starts, executor.map(fetch, starts)))
+
             # Progress output for "all spaces" mode
             if not space_key:
                 total_size = data.get('totalSize', data.get('size', '?'))
-                print(f"  Fetched batch {start//25 + 1}: {len(pages) + len(results)} pages so far (total: {total_size})", flush=True)
+                print(f"  Fetched batch {start//page_size + 1}: {len(pages) + len(results)} pages so far (total: {total_size})", flush=True)
 
             for page in results:
                 # Skip personal spaces if configured
@@ -328,22 +940,29 @@ class LucidchartScreenshotter:
                 if self.skip_personal and space.startswith('~'):
                     continue
 
-                # Extract body text for index hydration
-                body_html = page.get('body', {}).get('view', {}).get('value', '')
-                body_text = self._extract_text_from_html(body_html) if body_html else ''
-
                 # Extract diagram names from storage format (Lucidchart macro parameters)
                 storage_xml = page.get('body', {}).get('storage', {}).get('value', '')
                 diagram_names = self._extract_lucidchart_names(storage_xml)
+                if self.require_macro and not diagram_names:
+                    logger.info(f"  Skipping {page.get('title', page['id'])}: no Lucidchart macro in storage format")
+                    continue
 
-                pages.append({
-                    'id': page['id'],
-                    'title': page.get('title', 'Untitled'),
-                    'space_key': space,
-                    '_links': page.get('_links', {}),
-                    'body_text': body_text,
-                    'diagram_names': diagram_names,
-                })
+                # Extract body text for index hydration (storage format holds the
+                # same text as the rendered view; macro parameters are not text)
+                body_text = self._extract_text_from_html(_MACRO_PARAM_RE.sub(' ', storage_xml)) if storage_xml else ''
+                # Kept for change detection: a swapped documentId or page shows up only here
+                macro_params = tuple(_MACRO_PARAM_RE.findall(storage_xml)) if storage_xml else ()
+
+                pages.append(PageInfo(
+                    id=page['id'],
+                    title=page.get('title', 'Untitled'),
+                    space_key=space,
+                    link=page.get('_links', {}).get('webui', ''),
+                    version=page.get('version', {}).get('number'),
+                    diagram_names=tuple(diagram_names),
+                    body_text=body_text,
+                    macro_params=macro_params,
+                ))
 
                 # Check limit
                 if limit and len(pages) >= limit:
@@ -352,11 +971,78 @@ class LucidchartScreenshotter:
             start += len(results)
 
             # Confluence pagination
-            if len(results) < 25:
+            if len(results) < page_size:
                 break
 
         return pages
 
+    def _new_context(self, storage_state=None):
+        """Create a browser context, optionally preloaded with saved cookies/storage."""
+        context = self._browser.new_context(
+            viewport=VIEWPORT,
+            ignore_https_errors=True,
+            http_credentials={
+                'username': self.auth[0],
+                'password': self.auth[1]
+            },
+            storage_state=storage_state
+        )
+        context.route('**/*', self._route_request)
+        return context
+
+    def _route_request(self, route):
+        """
+        Abort requests a capture doesn't need; let everything Lucidchart through.
+
+        Skips fonts and media, and analytics and tracking calls. With
+        --block-assets it also skips images and scripts the Confluence page
+        pulls from other hosts (Confluence Cloud serves its own bundles from
+        CDNs, so this can stop a page rendering). Page navigations always go through.
+        """
+        request = route.request
+        resource_type = request.resource_type
+        parsed = urlparse(request.url)
+        host = parsed.hostname or ''
+        if resource_type == 'document' or _LUCID_HOST_RE.search(host):
+            route.continue_()
+        elif (resource_type in self._blocked_types
+                or _TRACKER_HOST_RE.search(host)
+                or parsed.path.startswith(_TRACKER_PATH_PREFIX)
+                or (self.block_assets and resource_type == 'script'
+                    and host != self._confluence_host and request.frame.parent_frame is None)):
+            route.abort()
+        else:
+            route.continue_()
+
+    def _session_is_valid(self):
+        """Check whether the current context is logged in to Confluence."""
+        try:
+            response = self._page.goto(f"{self.confluence_url}/rest/api/user/current", timeout=15000)
+            if response is None or not response.ok:
+                return False
+            return response.json().get('type') != 'anonymous'
+        except Exception as e:
+            logger.debug(f"Session check failed: {e}")
+            return False
+
+    def _auth_state_is_fresh(self):
+        """Whether a saved session exists and is recent enough to still be logged in."""
+        try:
+            age = time.time() - os.path.getmtime(self._auth_state_path)
+        except OSError:
+            return False
+        return age < AUTH_STATE_MAX_AGE
+
+    def _save_auth_state(self):
+        """Save the authenticated context's cookies/storage for later runs."""
+        try:
+            os.makedirs(self.content_dir, exist_ok=True)
+            self._context.storage_state(path=self._auth_state_path)
+            # Contains session cookies - keep it private
+            os.chmod(self._auth_state_path, 0o600)
+        except Exception as e:
+            logger.warning(f"Could not save browser session: {e}")
+
     def _init_browser(self, playwright, headless=True):
         """Initialize browser with Confluence authentication."""
         logger.info(f"Launching browser (headless={headless})...")
@@ -365,15 +1051,17 @@ class LucidchartScreenshotter:
             args=['--disable-web-security']  # May help with iframe access
         )
 
-        self._context = self._browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            ignore_https_errors=True,
-            http_credentials={
-                'username': self.auth[0],
-                'password': self.auth[1]
-            }
-        )
-
+        # Reuse the session saved by a recent run if it is still valid
+        if self._auth_state_is_fresh():
+            self._context = self._new_context(storage_state=self._auth_state_path)
+            self._page = self._context.new_page()
+            if self._session_is_valid():
+                print("Reusing saved Confluence session")
+                return
+            print("Saved Confluence session expired, logging in again...")
+            self._context.close()
+
+        self._context = self._new_context()
         self._page = self._context.new_page()
 
         # First, authenticate by visiting Confluence
@@ -393,6 +1081,71 @@ class LucidchartScreenshotter:
             except Exception as e:
                 print(f"Login form not found or already logged in: {e}")
 
+        self._save_auth_state()
+
+    def _ensure_page(self):
+        """
+        Make sure there is a live tab in the shared browser context.
+
+        The context (cookies, HTTP cache, Lucidchart script bundles) lives for
+        the whole run; if the tab crashed or was closed, open a fresh one in
+        the same context rather than losing the warm cache and session.
+        """
+        if self._page is None or self._page.is_closed():
+            logger.info("Browser tab closed, opening a new one in the same context")
+            self._page = self._context.new_page()
+        return self._page
+
+    def _page_url(self, page_id):
+        """Confluence view URL for a page id."""
+        return f"{self.confluence_url}/pages/viewpage.action?pageId={page_id}"
+
+    def _prefetch_pages(self, upcoming, dirs):
+        """
+        Start loading upcoming pages in background tabs without waiting for them.
+
+        The sync API can't run several gotos at once, but a location change
+        issued from JS returns immediately, so up to tabs-1 upcoming pages load
+        in the shared context while the current one is being captured.
+        screenshot_page_diagrams switches to a page's tab when it gets there.
+        """
+        if self._browser is None:
+            return
+        for page_info in upcoming:
+            if len(self._prefetched) >= self.tabs - 1:
+                break
+            if page_info.id in self._prefetched or (not self.force and self._is_page_unchanged(page_info, dirs)):
+                continue
+            try:
+                tab = self._free_tabs.pop() if self._free_tabs else self._context.new_page()
+                if tab.is_closed():
+                    tab = self._context.new_page()
+                # Deferred so the evaluate returns before the navigation tears down its context
+                tab.evaluate("url => setTimeout(() => { location.href = url; }, 0)",
+                             self._page_url(page_info.id))
+                self._prefetched[page_info.id] = tab
+            except Exception as e:
+                logger.debug(f"Prefetch of page {page_info.id} failed: {e}")
+
+    def _release_prefetched(self):
+        """Return tabs whose prefetched page was never captured to the free pool."""
+        self._free_tabs.extend(self._prefetched.values())
+        self._prefetched = {}
+
+    def _ensure_browser(self):
+        """
+        Launch and log in the browser on first use.
+
+        Runs where nothing needs capturing (resume skips, empty spaces, dry
+        runs, unchanged pages) never pay for starting Chromium.
+        """
+        if self._browser is None:
+            # One login at a time so parallel workers reuse the saved session
+            with self._browser_init_lock:
+                self._playwright = sync_playwright().start()
+                self._init_browser(self._playwright, headless=self.headless)
+        return self._ensure_page()
+
     def _close_browser(self):
         """Clean up browser resources."""
         if self._browser:
@@ -400,12 +1153,18 @@ class LucidchartScreenshotter:
             self._browser = None
             self._context = None
             self._page = None
+            self._prefetched = {}
+            self._free_tabs = []
+        if self._playwright:
+            self._playwright.stop()
+            self._playwright = None
 
-    def _try_maximize_lucidchart(self, element):
+    def _try_maximize_lucidchart(self, element, tag=None):
         """
         Try to maximize a Lucidchart diagram view before screenshotting.
 
         Looks for and clicks maximize/fullscreen buttons on Lucidchart embeds.
+        Pass the element's tag name if already known to save a browser round trip.
         Returns True if maximize was successful, False otherwise.
         """
         # Selectors for maximize/fullscreen buttons in Lucidchart embeds
@@ -440,46 +1199,38 @@ class LucidchartScreenshotter:
             element.hover()
             time.sleep(0.5)  # Wait for toolbar to appear
 
-            # Try to find maximize button within the element or nearby
-            for selector in maximize_selectors:
-                try:
-                    # Try within the element first
-                    max_btn = element.query_selector(selector)
-                    if max_btn and max_btn.is_visible():
-                        logger.info(f"    Found maximize button: {selector}")
-                        max_btn.click()
-                        time.sleep(1.5)  # Wait for animation
-                        return True
-                except Exception:
-                    pass
-
-                # Try in the page context (for floating toolbars)
-                try:
-                    max_btn = self._page.query_selector(selector)
-                    if max_btn and max_btn.is_visible():
-                        logger.info(f"    Found maximize button (page level): {selector}")
+            # Find a maximize button within the element, or in the page context
+            # (for floating toolbars), checking every selector in one round trip
+            try:
+                found = element.evaluate(_MAXIMIZE_BUTTON_JS, maximize_selectors)
+                if found:
+                    selector, in_element = maximize_selectors[found[0]], found[1]
+                    max_btn = (element if in_element else self._page).query_selector(selector)
+                    if max_btn:
+                        logger.info(f"    Found maximize button{'' if in_element else ' (page level)'}: {selector}")
                         max_btn.click()
                         time.sleep(1.5)  # Wait for animation
                         return True
-                except Exception:
-                    pass
+            except Exception:
+                pass
 
             # Try iframe-specific approach if element is/contains an iframe
             try:
-                iframe = element if element.evaluate('el => el.tagName') == 'IFRAME' else element.query_selector('iframe')
+                if tag is None:
+                    tag = element.evaluate('el => el.tagName')
+                iframe = element if tag == 'IFRAME' else element.query_selector('iframe')
                 if iframe:
                     frame = iframe.content_frame()
                     if frame:
-                        for selector in maximize_selectors:
-                            try:
-                                max_btn = frame.query_selector(selector)
-                                if max_btn and max_btn.is_visible():
-                                    logger.info(f"    Found maximize button in iframe: {selector}")
-                                    max_btn.click()
-                                    time.sleep(1.5)
-                                    return True
-                            except Exception:
-                                pass
+                        found = frame.evaluate(f"sels => ({_MAXIMIZE_BUTTON_JS})(null, sels)", maximize_selectors)
+                        if found:
+                            selector = maximize_selectors[found[0]]
+                            max_btn = frame.query_selector(selector)
+                            if max_btn:
+                                logger.info(f"    Found maximize button in iframe: {selector}")
+                                max_btn.click()
+                                time.sleep(1.5)
+                                return True
             except Exception as e:
                 logger.debug(f"    Could not access iframe content: {e}")
 
@@ -530,6 +1281,90 @@ class LucidchartScreenshotter:
             logger.debug(f"    Error restoring from maximize: {e}")
             return False
 
+    def _fetch_lucidchart_image(self, info, diagram_name, dirs):
+        """
+        Download a diagram's rendered preview directly from Lucidchart.
+
+        Much cheaper than waiting for the embed's JS viewer to render and
+        screenshotting it. Uses the browser context's Lucidchart cookies.
+
+        Args:
+            info: Element info from _ELEMENT_INFO_JS (needs src or docId)
+            diagram_name: Output file name without extension
+            dirs: Output directories dict
+
+        Returns:
+            str: Saved image path, or None if the direct fetch was not possible
+        """
+        src = info.get('src', '')
+        doc_id = _lucid_doc_id(info)
+        if not doc_id:
+            return None
+
+        parsed = urlparse(src)
+        origin = f"{parsed.scheme}://{parsed.netloc}" if parsed.netloc else 'https://lucid.app'
+        if origin in self._failed_fetch_origins:
+            return None
+        url = LUCIDCHART_PREVIEW_URL.format(origin=origin, doc_id=doc_id)
+
+        try:
+            cookies = {c['name']: c['value'] for c in self._context.cookies(url)}
+            self._rate_limiter.acquire()
+            # Not the Confluence client: its basic auth must not go to Lucidchart
+            response = requests.get(url, cookies=cookies, timeout=30)
+        except Exception as e:
+            logger.info(f"    Direct fetch from {origin} failed ({e}); screenshotting instead for this run")
+            self._failed_fetch_origins.add(origin)
+            return None
+
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        ext = LUCIDCHART_PREVIEW_TYPES.get(content_type)
+        if response.status_code != 200 or ext is None:
+            logger.info(f"    Direct fetch from {origin} returned {response.status_code} {content_type or '-'}; "
+                        f"screenshotting instead for this run")
+            self._failed_fetch_origins.add(origin)
+            return None
+
+        image_path = os.path.join(dirs['images'], f"{diagram_name}{ext}")
+        with open(image_path, 'wb') as f:
+            f.write(response.content)
+        return image_path
+
+    def _reuse_diagram(self, key, diagram_name, dirs):
+        """
+        Copy an already captured image of the same Lucidchart document.
+
+        Popular diagrams are embedded on many pages; copying the first capture
+        is far cheaper than rendering and screenshotting the embed again.
+
+        Args:
+            key: Lucid document id of the embed (empty never matches: a
+                document name alone can be shared by unrelated diagrams)
+            diagram_name: Output file name without extension
+            dirs: Output directories dict
+
+        Returns:
+            str: Image path for this page, or None if the document is new
+        """
+        cached = self._diagram_cache.get(key) if key else None
+        if cached is None:
+            return None
+
+        source_path, pending = cached
+        if pending is not None:
+            pending.result()  # The first capture may still be in the writer pool
+        if not os.path.exists(source_path):
+            return None
+
+        image_path = os.path.join(dirs['images'], diagram_name + os.path.splitext(source_path)[1])
+        if image_path != source_path:
+            try:
+                shutil.copyfile(source_path, image_path)
+            except OSError as e:
+                logger.debug(f"    Could not copy {source_path}: {e}")
+                return None
+        return image_path
+
     def _extract_text_with_ocr(self, image_path):
         """
         Extract text from an image using OCR.
@@ -544,154 +1379,219 @@ class LucidchartScreenshotter:
             logger.debug("    OCR not available (pytesseract not installed)")
             return ''
 
-        try:
-            # Open the image
-            image = Image.open(image_path)
+        text = _ocr_one(image_path)
+        if text:
+            logger.info(f"    OCR extracted {len(text)} characters")
+        return text
 
-            # Run OCR with Tesseract
-            # Use config for better accuracy on diagrams
-            custom_config = r'--oem 3 --psm 6'
-            text = pytesseract.image_to_string(image, config=custom_config)
+    def _run_ocr_batch(self):
+        """
+        OCR every image captured during this run and merge the text into its metadata.
 
-            # Clean up the extracted text
-            # Remove excessive whitespace while preserving some structure
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            cleaned_text = ' '.join(lines)
+        Runs after all screenshots are taken so Tesseract startup is spread across a
+        process pool instead of stalling the browser loop once per diagram.
 
-            # Filter out very short results (likely noise)
-            if len(cleaned_text) < 10:
-                logger.debug(f"    OCR result too short ({len(cleaned_text)} chars), discarding")
-                return ''
+        Returns:
+            int: Number of metadata records updated with OCR text
+        """
+        captured, self._captured = self._captured, []
+        if not captured:
+            return 0
 
-            logger.info(f"    OCR extracted {len(cleaned_text)} characters")
-            return cleaned_text
+        if not OCR_AVAILABLE:
+            logger.warning("OCR requested but pytesseract/Pillow are not installed, skipping")
+            return 0
 
-        except Exception as e:
-            logger.warning(f"    OCR failed: {e}")
-            return ''
+        print(f"\nRunning OCR on {len(captured)} captured images...")
+        image_paths = [png_path for png_path, _, _ in captured]
+
+        # {jsonl_path: {title: ocr_text}}
+        ocr_by_file = {}
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            texts = executor.map(_ocr_one, image_paths, chunksize=4)
+            for (_, meta_path, title), text in zip(captured, texts):
+                if text:
+                    ocr_by_file.setdefault(meta_path, {})[title] = text
+
+        # Rewrite each space's JSONL once with the OCR text merged in
+        updated = 0
+        for meta_path, ocr_texts in ocr_by_file.items():
+            try:
+                loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+                with open(meta_path, 'rb') as f:
+                    records = [loads(line) for line in f if line.strip()]
+                for metadata in records:
+                    text = ocr_texts.get(metadata.get('title'))
+                    if text:
+                        metadata['ocr_text'] = text
+                        updated += 1
+                tmp_path = meta_path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    for metadata in records:
+                        f.write(_json_line(metadata))
+                os.replace(tmp_path, meta_path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"    Could not add OCR text to {meta_path}: {e}")
+
+        print(f"  OCR text added to {updated} metadata records")
+        return updated
 
     def _dump_page_structure(self, page_title, dirs):
-        """Dump page HTML structure for debugging Lucidchart selectors."""
+        """Dump page HTML structure for debugging Lucidchart selectors (--debug only)."""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
         try:
-            # Get all iframes
-            iframes = self._page.query_selector_all('iframe')
+            structure = self._page.evaluate(_PAGE_STRUCTURE_JS)
+
+            # All iframes
+            iframes = structure['iframes']
             logger.debug(f"Found {len(iframes)} iframes on page")
             for i, iframe in enumerate(iframes):
-                src = iframe.get_attribute('src') or '(no src)'
-                classes = iframe.get_attribute('class') or '(no class)'
-                logger.debug(f"  iframe[{i}]: src={src[:100]}... class={classes}")
+                logger.debug(f"  iframe[{i}]: src={iframe['src'][:100]}... class={iframe['cls']}")
 
-            # Get all elements with 'lucid' in class/id/data attributes
-            lucid_elements = self._page.query_selector_all('[class*="lucid"], [id*="lucid"], [data-macro-name*="lucid"]')
+            # All elements with 'lucid' in class/id/data attributes
+            lucid_elements = structure['lucid']
             logger.debug(f"Found {len(lucid_elements)} elements with 'lucid' in attributes")
             for i, el in enumerate(lucid_elements):
-                tag = el.evaluate('el => el.tagName')
-                classes = el.get_attribute('class') or ''
-                el_id = el.get_attribute('id') or ''
-                logger.debug(f"  lucid[{i}]: <{tag}> class={classes[:50]} id={el_id}")
+                logger.debug(f"  lucid[{i}]: <{el['tag']}> class={el['cls'][:50]} id={el['id']}")
 
-            # Get all macro containers
-            macro_elements = self._page.query_selector_all('[data-macro-name]')
+            # All macro containers
+            macro_elements = structure['macros']
             logger.debug(f"Found {len(macro_elements)} macro elements")
             for i, el in enumerate(macro_elements):
-                macro_name = el.get_attribute('data-macro-name') or ''
-                tag = el.evaluate('el => el.tagName')
-                logger.debug(f"  macro[{i}]: <{tag}> data-macro-name={macro_name}")
-
-            # Save full HTML for deep analysis (only in debug mode)
-            if logger.level <= logging.DEBUG:
-                safe_title = re.sub(r'[^\w\s-]', '', page_title).strip()[:30]
-                debug_path = os.path.join(dirs['metadata'], f"_debug_{safe_title}.html")
-                html = self._page.content()
-                with open(debug_path, 'w', encoding='utf-8') as f:
-                    f.write(html)
-                logger.debug(f"Saved page HTML to {debug_path}")
+                logger.debug(f"  macro[{i}]: <{el['tag']}> data-macro-name={el['macro']}")
+
+            # Save full HTML for deep analysis
+            safe_title = _sanitize_name(page_title, 30)
+            debug_path = os.path.join(dirs['metadata'], f"_debug_{safe_title}.html")
+            html = self._page.content()
+            with open(debug_path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            logger.debug(f"Saved page HTML to {debug_path}")
 
         except Exception as e:
             logger.warning(f"Error dumping page structure: {e}")
 
-    def screenshot_page_diagrams(self, page_info, dirs, dry_run=False):
+    def screenshot_page_diagrams(self, page_info, dirs, dry_run=False, upcoming=()):
         """
         Navigate to a page and screenshot all Lucidchart diagrams.
 
         Args:
-            page_info: Dict with page id, title, space_key
+            page_info: PageInfo for the page
             dirs: Output directories dict
             dry_run: If True, don't actually screenshot
+            upcoming: Next PageInfos, preloaded in spare tabs during capture
 
         Returns:
             int: Number of diagrams captured
         """
-        page_id = page_info['id']
-        page_title = page_info['title']
-        space_key = page_info['space_key']
-        page_link = page_info.get('_links', {}).get('webui', '')
-        body_text = page_info.get('body_text', '')
-        diagram_names = page_info.get('diagram_names', [])
+        page_id = page_info.id
+        page_title = page_info.title
+        space_key = page_info.space_key
+        page_link = page_info.link
+        body_text = page_info.body_text
+        diagram_names = page_info.diagram_names
 
         # Navigate to page
-        page_url = f"{self.confluence_url}/pages/viewpage.action?pageId={page_id}"
+        page_url = self._page_url(page_id)
         logger.info(f"Loading page: {page_url}")
 
         if dry_run:
             logger.info(f"[DRY RUN] Would screenshot: {page_title}")
             return 1  # Assume at least one diagram
 
+        cached_count = 0 if self.force else self._is_page_unchanged(page_info, dirs)
+        if cached_count:
+            logger.info(f"  Unchanged since last run (version {page_info.version}), skipping")
+            return cached_count
+
+        self._ensure_browser()
+
         try:
-            self._page.goto(page_url, wait_until='networkidle', timeout=30000)
+            tab = self._prefetched.pop(page_id, None)
+            if tab is not None and not tab.is_closed():
+                # Already loading in a spare tab: switch to it and wait for it to settle
+                self._free_tabs.append(self._page)
+                self._page = tab
+                self._page.wait_for_load_state('networkidle', timeout=30000)
+            else:
+                self._page.goto(page_url, wait_until='networkidle', timeout=30000)
             logger.debug(f"Page loaded, URL now: {self._page.url}")
         except PlaywrightTimeout:
             logger.warning(f"Timeout loading page: {page_title}")
             return 0
 
-        # Wait for dynamic content to load
-        logger.debug("Waiting 3s for iframes/dynamic content...")
-        time.sleep(3)
+        # Overlap the next pages' loads with this page's capture
+        self._prefetch_pages(upcoming, dirs)
+
+        # Wait until an embed is attached rather than sleeping a fixed time
+        try:
+            self._page.wait_for_selector(LUCID_READY_SELECTOR, state='attached', timeout=5000)
+        except PlaywrightTimeout:
+            logger.debug("No Lucidchart embed attached after 5s, waiting for network to settle")
+            try:
+                self._page.wait_for_load_state('networkidle', timeout=3000)
+            except PlaywrightTimeout:
+                pass
 
         # Dump page structure for debugging
-        self._dump_page_structure(page_title, dirs)
+        if logger.isEnabledFor(logging.DEBUG):
+            self._dump_page_structure(page_title, dirs)
 
         # Find Lucidchart iframes/embeds
         diagrams_captured = 0
+        captured_images = []
 
-        # Comprehensive list of selectors to try
-        # Lucidchart embeds can be iframes, divs, or img tags depending on Confluence version
-        selectors = [
-            # Direct iframe selectors
-            'iframe[src*="lucid"]',
-            'iframe[src*="lucidchart"]',
-            'iframe[src*="app.lucid"]',
-            # Confluence macro containers
-            '[data-macro-name="lucidchart"]',
-            '.lucidchart-macro',
-            # Embedded image fallbacks (static renders)
-            'img[data-macro-name="lucidchart"]',
-            '.confluence-embedded-image[alt*="lucid" i]',
-            # Generic embed containers
-            '.embedded-macro[data-macro-name="lucidchart"]',
-            '.wysiwyg-macro[data-macro-name="lucidchart"]',
-            # Wrapper divs
-            '.lucidchart-wrapper',
-            '.lucid-embed',
-            'div[data-lucid-document-id]',
-        ]
-
+        selectors = LUCID_SELECTORS
         logger.info(f"Trying {len(selectors)} selectors...")
 
-        for selector in selectors:
-            try:
-                elements = self._page.query_selector_all(selector)
-                if elements:
-                    logger.info(f"  Selector '{selector}' matched {len(elements)} element(s)")
+        # Tag and box of every match of every selector in one round trip, so
+        # handles are only fetched when an element actually has to be screenshotted
+        try:
+            all_element_info = self._page.evaluate(_MATCH_INFO_JS, selectors)
+        except Exception as e:
+            logger.debug(f"  Could not describe candidates: {e}")
+            all_element_info = [None] * len(selectors)
+
+        # Several selectors can match the same embed; capture each position once
+        seen_boxes = set()
+        expected_diagrams = max(1, len(diagram_names))
+
+        # A page missing from the page cache may have been cut short by an
+        # interrupted run: keep the images that run already saved and recorded
+        # for this page (an image without its record would never be indexed)
+        resuming = not self.force and str(page_id) not in self._get_page_cache()
+        recorded = self._recorded_images(dirs).get(str(page_id), ()) if resuming else ()
+
+        for selector, element_info in zip(selectors, all_element_info):
+            # Every diagram named in the page's storage format is already captured
+            if diagrams_captured >= expected_diagrams:
+                break
 
-                for idx, element in enumerate(elements):
+            # Nothing (or nothing big enough) matched: no handles needed
+            if element_info is not None and not any(_is_diagram_sized(info) for info in element_info):
+                if element_info:
+                    logger.debug(f"  Selector '{selector}' matched only elements too small to capture")
+                continue
+            try:
+                # Without the batched describe, handles are the only way to see the matches
+                elements = None if element_info else self._page.query_selector_all(selector)
+                element_info = element_info or []
+                match_count = len(element_info) if element_info else len(elements)
+                if match_count:
+                    logger.info(f"  Selector '{selector}' matched {match_count} element(s)")
+
+                for idx in range(match_count):
                     # Log element details
-                    try:
-                        tag = element.evaluate('el => el.tagName')
-                        box = element.bounding_box()
-                        logger.debug(f"    Element {idx}: <{tag}> box={box}")
-                    except:
-                        pass
+                    tag = element_info[idx]['tag'] if idx < len(element_info) else None
+                    box_key = None
+                    if idx < len(element_info):
+                        logger.debug(f"    Element {idx}: <{tag}> box={element_info[idx]}")
+                        info = element_info[idx]
+                        box_key = tuple(round(info[k]) for k in ('x', 'y', 'width', 'height'))
+                        if box_key in seen_boxes:
+                            logger.debug(f"    Skipped: same box as an element already captured")
+                            continue
 
                     # Generate unique name for this diagram
                     # First try to use diagram name from Lucidchart macro (documentName parameter)
@@ -702,65 +1602,118 @@ class LucidchartScreenshotter:
 
                     if macro_name:
                         # Use the Lucidchart document name from the macro
-                        safe_name = re.sub(r'[^\w\s-]', '', macro_name).strip()[:80]
-                        diagram_name = safe_name if safe_name else re.sub(r'[^\w\s-]', '', page_title).strip()[:50]
+                        safe_name = _sanitize_name(macro_name, 80)
+                        diagram_name = safe_name if safe_name else _sanitize_name(page_title, 50)
                     else:
                         # Fallback to page title
-                        safe_title = re.sub(r'[^\w\s-]', '', page_title).strip()[:50]
+                        safe_title = _sanitize_name(page_title, 50)
                         diagram_name = f"{safe_title}_{idx+1}" if idx > 0 else safe_title
 
+                    if recorded:
+                        existing_name = next((diagram_name + ext for ext in ('.png', '.jpg')
+                                              if diagram_name + ext in recorded
+                                              and diagram_name + ext in dirs['existing']), None)
+                        if existing_name:
+                            logger.info(f"    EXISTS: {existing_name} (kept from an earlier run)")
+                            captured_images.append(existing_name)
+                            diagrams_captured += 1
+                            if box_key is not None:
+                                seen_boxes.add(box_key)
+                            continue
+
                     # Screenshot the element
-                    png_path = os.path.join(dirs['images'], f"{diagram_name}.png")
+                    png_path = dirs['image_tmpl'].format(diagram_name)
 
                     try:
-                        # Get bounding box
-                        box = element.bounding_box()
+                        # Box from the batched describe (same DOM order), else ask the browser
+                        box = element_info[idx] if idx < len(element_info) else elements[idx].bounding_box()
                         if box:
                             logger.debug(f"    Bounding box: {box['width']}x{box['height']} at ({box['x']}, {box['y']})")
 
-                            if box['width'] > 50 and box['height'] > 50:
-                                # Scroll element into view first
-                                element.scroll_into_view_if_needed()
-                                time.sleep(0.5)  # Brief pause after scroll
-
-                                # Try to maximize the Lucidchart view before screenshot
-                                was_maximized = self._try_maximize_lucidchart(element)
-                                if was_maximized:
-                                    logger.info(f"    Maximized view for better screenshot")
-                                    time.sleep(1)  # Wait for maximize animation
-
-                                # Screenshot element directly (or page if maximized)
-                                if was_maximized:
-                                    self._page.screenshot(path=png_path, full_page=False)
+                            if _is_diagram_sized(box):
+                                was_maximized = False
+                                pending = None
+                                info = element_info[idx] if idx < len(element_info) else {}
+                                diagram_key = _lucid_doc_id(info)
+
+                                # Same document already captured on an earlier page: copy it
+                                reused_path = self._reuse_diagram(diagram_key, diagram_name, dirs)
+                                # Prefer Lucidchart's own rendered image when the embed exposes its document
+                                fetched_path = None
+                                if not reused_path and info and self.direct_fetch:
+                                    fetched_path = self._fetch_lucidchart_image(info, diagram_name, dirs)
+
+                                if reused_path:
+                                    png_path = reused_path
+                                    capture_method = 'reused'
+                                    logger.info(f"    REUSED: {diagram_name} (already captured)")
+                                elif fetched_path:
+                                    png_path = fetched_path
+                                    capture_method = 'direct'
+                                    logger.info(f"    FETCHED: {diagram_name} (direct from Lucidchart)")
                                 else:
-                                    element.screenshot(path=png_path)
-                                logger.info(f"    CAPTURED: {diagram_name} ({box['width']}x{box['height']})")
-
-                                # Restore from maximized view if we maximized
-                                if was_maximized:
-                                    self._restore_from_maximize()
+                                    capture_method = 'screenshot'
+                                    # Only now does the element need a handle
+                                    if elements is None:
+                                        elements = self._page.query_selector_all(selector)
+                                    if idx >= len(elements):
+                                        raise RuntimeError("element detached since the page was described")
+                                    element = elements[idx]
+
+                                    # Scroll element into view first, measuring it in the same call
+                                    clip = element.evaluate(_SCROLL_INTO_VIEW_JS)
+
+                                    # Try to maximize the Lucidchart view before screenshot
+                                    was_maximized = self._try_maximize_lucidchart(element, tag=tag)
+                                    if was_maximized:
+                                        logger.info(f"    Maximized view for better screenshot")
+                                        time.sleep(1)  # Wait for maximize animation
+
+                                    # Screenshot element directly (or page if maximized)
+                                    if was_maximized:
+                                        pending = self._capture(self._page, png_path, full_page=False)
+                                    else:
+                                        # Already scrolled into view: clip the viewport instead of
+                                        # letting element.screenshot() scroll and re-measure again
+                                        if clip and _fits_viewport(clip):
+                                            pending = self._capture(self._page, png_path, clip=clip)
+                                        else:
+                                            pending = self._capture(element, png_path)
+                                    logger.info(f"    CAPTURED: {diagram_name} ({box['width']}x{box['height']})")
+
+                                    # Restore from maximized view if we maximized
+                                    if was_maximized:
+                                        self._restore_from_maximize()
+
+                                if diagram_key and not reused_path:
+                                    self._diagram_cache[diagram_key] = (png_path, pending)
 
                                 # Save metadata
                                 metadata = {
-                                    'title': f"{diagram_name}.png",
+                                    'title': os.path.basename(png_path),
                                     'space': {'key': space_key},
                                     'page_id': page_id,
                                     'page_title': page_title,
                                     'page_link': page_link,
                                     'body_text': body_text,
+                                    'content_hash': _content_hash(page_info),
                                     'source': 'lucidchart',
                                     'selector_used': selector,
                                     'dimensions': {'width': box['width'], 'height': box['height']},
                                     'was_maximized': was_maximized,
+                                    'capture_method': capture_method,
                                     '_expandable': {
                                         'container': f"/rest/api/content/{page_id}"
                                     }
                                 }
-                                meta_path = os.path.join(dirs['metadata'], f"{diagram_name}.png.json")
-                                with open(meta_path, 'w', encoding='utf-8') as f:
-                                    json.dump(metadata, f, indent=2)
+                                self._write_metadata(dirs, metadata)
+                                self._captured.append((png_path, dirs['meta_path'], metadata['title']))
+                                captured_images.append(os.path.basename(png_path))
+                                dirs['existing'].add(captured_images[-1])
 
                                 diagrams_captured += 1
+                                if box_key is not None:
+                                    seen_boxes.add(box_key)
                             else:
                                 logger.debug(f"    Skipped: too small ({box['width']}x{box['height']})")
                         else:
@@ -776,52 +1729,50 @@ class LucidchartScreenshotter:
         if diagrams_captured == 0:
             logger.info("No specific Lucidchart elements found, trying fullpage content capture...")
 
-            content_selectors = [
-                '#main-content',
-                '.wiki-content',
-                '#content-body',
-                '#content',
-                'article',
-            ]
-
-            for content_sel in content_selectors:
-                try:
-                    content_area = self._page.query_selector(content_sel)
-                    if content_area:
-                        box = content_area.bounding_box()
-                        if box and box['width'] > 100 and box['height'] > 100:
-                            safe_title = re.sub(r'[^\w\s-]', '', page_title).strip()[:50]
-                            diagram_name = f"{safe_title}_fullpage"
-                            png_path = os.path.join(dirs['images'], f"{diagram_name}.png")
-
-                            content_area.screenshot(path=png_path)
-                            logger.info(f"    CAPTURED fullpage via {content_sel}: {diagram_name}")
-
-                            metadata = {
-                                'title': f"{diagram_name}.png",
-                                'space': {'key': space_key},
-                                'page_id': page_id,
-                                'page_title': page_title,
-                                'page_link': page_link,
-                                'body_text': body_text,
-                                'source': 'lucidchart-fullpage',
-                                'selector_used': content_sel,
-                                '_expandable': {
-                                    'container': f"/rest/api/content/{page_id}"
-                                }
-                            }
-                            meta_path = os.path.join(dirs['metadata'], f"{diagram_name}.png.json")
-                            with open(meta_path, 'w', encoding='utf-8') as f:
-                                json.dump(metadata, f, indent=2)
+            try:
+                # Pick the container by selector priority in one evaluate, not N queries
+                content_sel = self._page.evaluate(_CONTENT_AREA_JS, CONTENT_SELECTORS)
+                content_area = self._page.query_selector(content_sel) if content_sel else None
+
+                if content_area:
+                    safe_title = _sanitize_name(page_title, 50)
+                    diagram_name = f"{safe_title}_fullpage"
+                    png_path = dirs['image_tmpl'].format(diagram_name)
+
+                    self._capture(content_area, png_path)
+                    logger.info(f"    CAPTURED fullpage via {content_sel}: {diagram_name}")
+
+                    metadata = {
+                        'title': f"{diagram_name}{self._image_ext}",
+                        'space': {'key': space_key},
+                        'page_id': page_id,
+                        'page_title': page_title,
+                        'page_link': page_link,
+                        'body_text': body_text,
+                        'content_hash': _content_hash(page_info),
+                        'source': 'lucidchart-fullpage',
+                        'selector_used': content_sel,
+                        '_expandable': {
+                            'container': f"/rest/api/content/{page_id}"
+                        }
+                    }
+                    self._write_metadata(dirs, metadata)
+                    self._captured.append((png_path, dirs['meta_path'], metadata['title']))
+                    captured_images.append(os.path.basename(png_path))
+                    dirs['existing'].add(captured_images[-1])
+
+                    diagrams_captured = 1
 
-                            diagrams_captured = 1
-                            break  # Got one, stop trying
+            except Exception as e:
+                logger.debug(f"  Fullpage content capture failed: {e}")
 
-                except Exception as e:
-                    logger.debug(f"  Content selector '{content_sel}' failed: {e}")
+        # One write per page; must land before the page cache records it as done
+        self._flush_metadata(dirs)
 
         if diagrams_captured == 0:
             logger.warning(f"  NO DIAGRAMS CAPTURED for page: {page_title}")
+        else:
+            self._update_page_cache(page_info, captured_images)
 
         return diagrams_captured
 
@@ -844,25 +1795,127 @@ class LucidchartScreenshotter:
 
         total_diagrams = 0
         for idx, page in enumerate(pages):
-            print(f"  [{idx+1}/{len(pages)}] {page['title'][:50]}...")
+            print(f"  [{idx+1}/{len(pages)}] {page.title[:50]}...")
             count = self.screenshot_page_diagrams(page, dirs, dry_run)
             total_diagrams += count
+        self._flush_page_cache()
 
         return total_diagrams
 
     def _get_completed_spaces(self):
-        """Scan metadata directory to find spaces that have already been processed."""
-        metadata_dir = os.path.join(self.content_dir, 'metadata')
-        if not os.path.exists(metadata_dir):
-            return set()
-        completed = set()
-        for entry in os.listdir(metadata_dir):
-            entry_path = os.path.join(metadata_dir, entry)
-            if os.path.isdir(entry_path) and os.listdir(entry_path):
-                completed.add(entry)
-        return completed
-
-    def extract_all(self, spaces=None, limit=None, dry_run=False, headless=True, resume=False):
+        """
+        Get the spaces that have already been fully processed.
+
+        Reads the completed-spaces manifest; content from runs that predate it
+        falls back to scanning for non-empty metadata directories.
+        """
+        if self._completed_spaces is None:
+            if os.path.exists(self._completed_spaces_path):
+                try:
+                    with open(self._completed_spaces_path, 'r', encoding='utf-8') as f:
+                        self._completed_spaces = set(json.load(f))
+                    return self._completed_spaces
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring unreadable manifest {self._completed_spaces_path}: {e}")
+
+            self._completed_spaces = set()
+            metadata_dir = os.path.join(self.content_dir, 'metadata')
+            if os.path.isdir(metadata_dir):
+                with os.scandir(metadata_dir) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False) and any(os.scandir(entry.path)):
+                            self._completed_spaces.add(entry.name)
+        return self._completed_spaces
+
+    def _mark_space_completed(self, space_key):
+        """Add a space to the completed-spaces manifest."""
+        with self._completed_spaces_lock:
+            completed = self._get_completed_spaces()
+            completed.add(space_key)
+            os.makedirs(self.content_dir, exist_ok=True)
+            tmp_path = self._completed_spaces_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(sorted(completed), f)
+            os.replace(tmp_path, self._completed_spaces_path)
+
+    def _process_space(self, space_key, limit=None, dry_run=False):
+        """
+        Find and capture the Lucidchart pages of one space.
+
+        Returns:
+            tuple: (pages_found, diagrams_captured)
+        """
+        pages = self.get_pages_with_lucidchart(space_key, limit=limit)
+
+        if not pages:
+            print(f"  {space_key}: No Lucidchart content found")
+            return 0, 0
+
+        dirs = self._ensure_directories(space_key)
+        print(f"  {space_key}: Found {len(pages)} pages with Lucidchart")
+
+        total_diagrams = 0
+        for page_idx, page in enumerate(pages):
+            print(f"  {space_key} [{page_idx+1}/{len(pages)}] {page.title[:50]}...")
+            upcoming = pages[page_idx + 1:page_idx + self.tabs]
+            total_diagrams += self.screenshot_page_diagrams(page, dirs, dry_run, upcoming=upcoming)
+        self._release_prefetched()
+        self._flush_page_cache()
+
+        return len(pages), total_diagrams
+
+    def _new_worker(self):
+        """
+        Create a screenshotter for a worker thread.
+
+        The worker gets its own browser, page and HTTP client (Playwright's sync
+        API is not thread-safe) but shares the rate limiter, page cache and OCR
+        queue with this instance.
+        """
+        worker = LucidchartScreenshotter(self.settings, self.image_format, self.image_quality,
+                                         block_assets=self.block_assets, tabs=self.tabs,
+                                         require_macro=self.require_macro, force=self.force,
+                                         direct_fetch=self.direct_fetch)
+        worker._rate_limiter = self._rate_limiter
+        worker._failed_fetch_origins = self._failed_fetch_origins
+        worker._page_cache = self._get_page_cache()
+        worker._page_cache_lock = self._page_cache_lock
+        worker._browser_init_lock = self._browser_init_lock
+        worker._captured = self._captured
+        worker._completed_spaces = self._get_completed_spaces()
+        worker._completed_spaces_lock = self._completed_spaces_lock
+        return worker
+
+    def _run_worker(self, jobs, limit, dry_run, headless):
+        """
+        Drain the space queue with one browser.
+
+        Returns:
+            list: (pages_found, diagrams_captured) per processed space
+        """
+        results = []
+        self.headless = headless  # Browser itself starts on the first capture
+        try:
+            while True:
+                try:
+                    label, space_key = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                print(f"\n{label} Processing: {space_key}")
+                results.append(self._process_space(space_key, limit=limit, dry_run=dry_run))
+                # Partial (--test) and dry runs must not make --resume skip the space
+                if limit is None and not dry_run:
+                    self._mark_space_completed(space_key)
+        finally:
+            self._close_image_writer()
+            self._close_metadata_files()
+            self._flush_page_cache()
+            self._close_http_client()
+            self._close_browser()
+        return results
+
+    def extract_all(self, spaces=None, limit=None, dry_run=False, headless=True, resume=False,
+                    ocr=False, workers=1):
         """
         Extract Lucidchart diagrams from all (or specified) spaces.
 
@@ -871,71 +1924,63 @@ class LucidchartScreenshotter:
             limit: Max pages per space (for testing)
             dry_run: If True, don't capture
             headless: Run browser in headless mode
-            resume: If True, skip spaces that already have metadata
+            resume: If True, skip spaces completed by earlier runs
+            ocr: If True, OCR all captured images in a batch once capture finishes
+            workers: Number of browsers capturing spaces in parallel
 
         Returns:
             int: Total diagrams captured
         """
-        with sync_playwright() as playwright:
-            self._init_browser(playwright, headless=headless)
-
-            try:
-                completed_spaces = self._get_completed_spaces() if resume else set()
-                if completed_spaces:
-                    print(f"\nResume mode: {len(completed_spaces)} spaces already completed, will be skipped")
-
-                if spaces:
-                    # Process specified spaces
-                    total = 0
-                    for idx, space_key in enumerate(spaces):
-                        if space_key in completed_spaces:
-                            print(f"\n[Space {idx+1}/{len(spaces)}] Skipping (already completed): {space_key}")
-                            continue
-                        print(f"\n[Space {idx+1}/{len(spaces)}] Processing: {space_key}")
-                        total += self.extract_space(space_key, limit=limit, dry_run=dry_run)
-                    return total
-                else:
-                    # Get all spaces first, then process each one
-                    # This is more reliable than loading all pages across all spaces at once
-                    all_spaces = self.get_all_spaces()
-
-                    if not all_spaces:
-                        print("No spaces found or accessible.")
-                        return 0
-
-                    print(f"\nWill check {len(all_spaces)} spaces for Lucidchart content...")
-
-                    total = 0
-                    spaces_with_content = 0
-
-                    for idx, space_key in enumerate(all_spaces):
-                        if space_key in completed_spaces:
-                            print(f"\n[Space {idx+1}/{len(all_spaces)}] Skipping (already completed): {space_key}")
-                            continue
-
-                        print(f"\n[Space {idx+1}/{len(all_spaces)}] Checking: {space_key}")
-
-                        # Get pages with Lucidchart in this space
-                        pages = self.get_pages_with_lucidchart(space_key, limit=limit)
-
-                        if not pages:
-                            print(f"  No Lucidchart content found")
-                            continue
-
-                        spaces_with_content += 1
-                        dirs = self._ensure_directories(space_key)
-                        print(f"  Found {len(pages)} pages with Lucidchart")
+        completed_spaces = set(self._get_completed_spaces()) if resume else set()
+        if completed_spaces:
+            print(f"\nResume mode: {len(completed_spaces)} spaces already completed, will be skipped")
+
+        if not spaces:
+            # Get all spaces first, then process each one
+            # This is more reliable than loading all pages across all spaces at once
+            spaces = self.get_all_spaces()
+
+            if not spaces:
+                print("No spaces found or accessible.")
+                self._close_http_client()
+                return 0
+
+            print(f"\nWill check {len(spaces)} spaces for Lucidchart content...")
+
+        jobs = queue.Queue()
+        for idx, space_key in enumerate(spaces):
+            label = f"[Space {idx+1}/{len(spaces)}]"
+            if space_key in completed_spaces:
+                print(f"\n{label} Skipping (already completed): {space_key}")
+                continue
+            jobs.put((label, space_key))
+
+        # Each worker thread drives its own browser; spaces are handed out from
+        # the shared queue so one worker owns each space's output files
+        workers = max(1, min(workers, jobs.qsize()))
+        try:
+            if workers == 1:
+                results = self._run_worker(jobs, limit, dry_run, headless)
+            else:
+                print(f"Capturing with {workers} parallel browsers")
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [
+                        executor.submit(self._new_worker()._run_worker, jobs, limit, dry_run, headless)
+                        for _ in range(workers)
+                    ]
+                    results = [r for future in futures for r in future.result()]
+        finally:
+            self._close_http_client()
 
-                        for page_idx, page in enumerate(pages):
-                            print(f"  [{page_idx+1}/{len(pages)}] {page['title'][:50]}...")
-                            count = self.screenshot_page_diagrams(page, dirs, dry_run)
-                            total += count
+        spaces_with_content = sum(1 for pages_found, _ in results if pages_found)
+        print(f"\n  Summary: Found Lucidchart content in {spaces_with_content} of {len(spaces)} spaces")
+        total = sum(count for _, count in results)
 
-                    print(f"\n  Summary: Found Lucidchart content in {spaces_with_content} of {len(all_spaces)} spaces")
-                    return total
+        # OCR after the browsers are gone so Tesseract workers get the whole machine
+        if ocr and not dry_run:
+            self._run_ocr_batch()
 
-            finally:
-                self._close_browser()
+        return total
 
 
 def main():
@@ -958,7 +2003,26 @@ def main():
     parser.add_argument('--no-headless', action='store_false', dest='headless',
                         help='Show browser window (useful for debugging)')
     parser.add_argument('--resume', action='store_true',
-                        help='Resume from checkpoint: skip spaces that already have metadata')
+                        help='Resume from checkpoint: skip spaces completed by earlier runs')
+    parser.add_argument('--ocr', action='store_true',
+                        help='OCR captured images after capture and store text in metadata')
+    parser.add_argument('--image-format', '--format', dest='format', choices=['png', 'jpeg'], default='png',
+                        help='Screenshot image format; jpeg is much smaller (default: png)')
+    parser.add_argument('--quality', type=int, default=85,
+                        help='JPEG quality 0-100 (default: 85)')
+    parser.add_argument('--tabs', type=int, default=2,
+                        help='Tabs per browser; extra tabs preload upcoming pages (default: 2)')
+    parser.add_argument('--block-assets', action='store_true',
+                        help="Don't load Confluence images or third-party page scripts either (faster; static Lucidchart "
+                             "renders and fullpage fallbacks lose images, CDN-hosted Confluence may not render)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of browsers capturing spaces in parallel (default: 1)')
+    parser.add_argument('--require-macro', action='store_true',
+                        help='Skip search hits with no Lucidchart macro in their storage format')
+    parser.add_argument('--force', action='store_true',
+                        help='Recapture all pages, ignoring the page cache and existing images')
+    parser.add_argument('--direct-fetch', action='store_true',
+                        help="Download Lucidchart's rendered preview instead of screenshotting when it is available")
 
     args = parser.parse_args()
 
@@ -977,7 +2041,10 @@ def main():
 
     limit = 5 if args.test else None
 
-    screenshotter = LucidchartScreenshotter()
+    screenshotter = LucidchartScreenshotter(image_format=args.format, image_quality=args.quality,
+                                            block_assets=args.block_assets, tabs=args.tabs,
+                                            require_macro=args.require_macro, force=args.force,
+                                            direct_fetch=args.direct_fetch)
 
     print("=" * 60)
     print("LUCIDCHART SCREENSHOT EXTRACTOR")
@@ -988,6 +2055,12 @@ def main():
     print(f"Test mode: {args.test}")
     print(f"Dry run: {args.dry_run}")
     print(f"Resume: {args.resume}")
+    print(f"OCR: {args.ocr}")
+    print(f"Format: {args.format}")
+    print(f"Workers: {args.workers}")
+    print(f"Tabs per worker: {args.tabs}")
+    print(f"Block assets: {args.block_assets}")
+    print(f"Direct fetch: {args.direct_fetch}")
     print(f"Maximize: enabled (attempts to maximize charts before capture)")
     print("=" * 60)
 
@@ -996,7 +2069,9 @@ def main():
         limit=limit,
         dry_run=args.dry_run,
         headless=args.headless,
-        resume=args.resume
+        resume=args.resume,
+        ocr=args.ocr,
+        workers=args.workers
     )
 
     print("\n" + "=" * 60)
@@ -13,20 +13,35 @@ Requirements:
     - Ubuntu/Debian: apt-get install tesseract-ocr
     - Windows: https://github.com/tesseract-ocr/tesseract
 
+    Optional, much faster on large batches (keeps Tesseract loaded):
+    pip install tesserocr
+
+    Optional, faster image decoding and preprocessing:
+    pip install opencv-python-headless
+
 Usage:
     python extractor/ocr_extract.py path/to/image.png
     python extractor/ocr_extract.py path/to/images/*.png
     python extractor/ocr_extract.py --dir content/images/SPACE
+    python extractor/ocr_extract.py --dir content/images/SPACE --workers 8
+
+Results are cached by image content in .ocr_cache.json next to the images
+(in --dir, or the images' common directory; see --cache), so re-running over
+unchanged screenshots skips Tesseract entirely.
 """
 
 import os
 import sys
+import json
+import hashlib
 import argparse
 import glob
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
 
 try:
     import pytesseract
-    from PIL import Image
+    from PIL import Image, ImageFilter, ImageStat
 except ImportError:
     print("=" * 60)
     print("ERROR: OCR dependencies not installed")
@@ -41,30 +56,231 @@ except ImportError:
     print("=" * 60)
     sys.exit(1)
 
+# In-process Tesseract API (optional, falls back to the pytesseract CLI wrapper)
+try:
+    from tesserocr import PyTessBaseAPI, PSM, OEM
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+# OpenCV image decoding/preprocessing (optional, falls back to Pillow)
+try:
+    import cv2
+    import numpy as np
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+# One Tesseract API per process, created on first use so the language data
+# is loaded once rather than by a new tesseract process per image
+_api = None
+
+
+def _get_api():
+    """Get this process's Tesseract API handle (tesserocr only)."""
+    global _api
+    if _api is None:
+        # Same settings as the pytesseract config below (psm is set per image)
+        _api = PyTessBaseAPI(lang='eng', psm=PSM.SINGLE_BLOCK, oem=OEM.DEFAULT)
+    return _api
+
+
+def _init_worker():
+    """Load Tesseract in a new worker process before it takes its first image."""
+    # Tesseract starts several OpenMP threads per image by default; with one
+    # image per worker process that oversubscribes the CPUs, so cap it at one
+    # thread (inherited by the tesseract processes pytesseract starts)
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+    if TESSEROCR_AVAILABLE:
+        _get_api()
+
+
+# OCR result cache kept with the images: {sha256 of image bytes + options: cleaned text}
+OCR_CACHE_FILE = '.ocr_cache.json'
+
+# Longest image edge handed to Tesseract; its cost scales with pixel count and
+# diagram text is still comfortably legible at this size (same as the screenshotter)
+OCR_MAX_DIMENSION = 2000
+
+# Variance of the Laplacian (edge response) below which an image has no
+# strokes for Tesseract to find. Flat and smoothly shaded tiles score ~0, while
+# even one short word on a 2000px screenshot scores a few units, so keep it low
+BLANK_IMAGE_EDGE_VARIANCE = 0.5
 
-def extract_text_from_image(image_path, verbose=False):
+# 3x3 Laplacian for the Pillow fallback; offset keeps negative responses in range
+_LAPLACIAN_KERNEL = ImageFilter.Kernel((3, 3), [0, 1, 0, 1, -4, 1, 0, 1, 0], scale=1, offset=128)
+
+# Default Tesseract page segmentation mode (6: uniform block of text)
+DEFAULT_PSM = 6
+
+# Image types picked up by --dir
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg'})
+
+
+def _otsu_threshold(histogram):
+    """
+    Pick the grey level that best separates a 256-bin histogram into two classes.
+
+    Args:
+        histogram: Pixel counts per grey level (PIL Image.histogram() of an 'L' image)
+
+    Returns:
+        int: Threshold; levels above it are background
+    """
+    total = sum(histogram)
+    sum_all = sum(level * count for level, count in enumerate(histogram))
+    sum_below = 0
+    weight_below = 0
+    best_level, best_variance = 0, -1.0
+
+    for level, count in enumerate(histogram):
+        weight_below += count
+        if weight_below == 0:
+            continue
+        weight_above = total - weight_below
+        if weight_above == 0:
+            break
+        sum_below += level * count
+        mean_below = sum_below / weight_below
+        mean_above = (sum_all - sum_below) / weight_above
+        variance = weight_below * weight_above * (mean_below - mean_above) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+
+    return best_level
+
+
+def preprocess_image(image):
+    """
+    Binarize a screenshot for OCR: grayscale, light blur, Otsu threshold.
+
+    Coloured shape fills and anti-aliased text become plain black on white,
+    which Tesseract segments faster and reads more reliably.
+
+    Args:
+        image: PIL Image
+
+    Returns:
+        PIL Image in mode 'L' (black text on white)
+    """
+    # Transparent screenshot backgrounds would otherwise turn black
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image)
+
+    image = image.convert('L').filter(ImageFilter.GaussianBlur(radius=1))
+    threshold = _otsu_threshold(image.histogram())
+    return image.point(lambda level: 255 if level > threshold else 0)
+
+
+def _read_gray_cv2(image_path):
+    """
+    Decode an image straight to an 8-bit grayscale array with OpenCV.
+
+    Args:
+        image_path: Path to the image file
+
+    Returns:
+        numpy.ndarray of dtype uint8, shape (height, width)
+    """
+    image = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f"could not decode {image_path}")
+
+    height, width = image.shape[:2]
+    if max(height, width) > OCR_MAX_DIMENSION:
+        scale = OCR_MAX_DIMENSION / max(height, width)
+        image = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+
+    if image.ndim == 3 and image.shape[2] == 4:
+        # Transparent screenshot backgrounds would otherwise turn black
+        alpha = image[:, :, 3:] / np.float32(255)
+        image = (image[:, :, :3] * alpha + 255 * (1 - alpha)).astype(np.uint8)
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+def _preprocess_cv2(image):
+    """OpenCV equivalent of preprocess_image for a grayscale array."""
+    image = cv2.GaussianBlur(image, (3, 3), 0)
+    _, image = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return image
+
+
+def _edge_variance(image):
+    """Variance of the Laplacian of a grayscale numpy array or PIL image."""
+    if CV2_AVAILABLE and not isinstance(image, Image.Image):
+        return cv2.Laplacian(image, cv2.CV_64F).var()
+    return ImageStat.Stat(image.convert('L').filter(_LAPLACIAN_KERNEL)).var[0]
+
+
+def _ocr(image, psm=DEFAULT_PSM):
+    """Run Tesseract on a PIL image or a grayscale numpy array."""
+    # OCR config optimized for diagrams
+    # --oem 3: Use both legacy and LSTM engines
+    # --psm 6: Assume uniform block of text (11: sparse text, no block layout)
+    if TESSEROCR_AVAILABLE:
+        api = _get_api()
+        api.SetPageSegMode(psm)
+        if isinstance(image, Image.Image):
+            api.SetImage(image)
+        else:
+            height, width = image.shape
+            api.SetImageBytes(image.tobytes(), width, height, 1, width)
+        return api.GetUTF8Text()
+
+    custom_config = f'--oem 3 --psm {psm}'
+    return pytesseract.image_to_string(image, config=custom_config)
+
+
+def extract_text_from_image(image_path, verbose=False, preprocess=True, psm=DEFAULT_PSM):
     """
     Extract text from an image using OCR.
 
     Args:
         image_path: Path to the image file
         verbose: Print extra info
+        preprocess: Binarize the image first (see preprocess_image)
+        psm: Tesseract page segmentation mode
 
     Returns:
         str: Extracted text
     """
     try:
-        image = Image.open(image_path)
+        if CV2_AVAILABLE:
+            # Decodes several times faster than Pillow and goes straight to grayscale
+            image = _read_gray_cv2(image_path)
+
+            if verbose:
+                print(f"  Image size: ({image.shape[1]}, {image.shape[0]})")
+                print("  Image mode: L")
 
-        if verbose:
-            print(f"  Image size: {image.size}")
-            print(f"  Image mode: {image.mode}")
+            # Flat tiles have nothing to read: don't start Tesseract for them
+            if _edge_variance(image) < BLANK_IMAGE_EDGE_VARIANCE:
+                return ''
+
+            if preprocess:
+                image = _preprocess_cv2(image)
+        else:
+            image = Image.open(image_path)
 
-        # OCR config optimized for diagrams
-        # --oem 3: Use both legacy and LSTM engines
-        # --psm 6: Assume uniform block of text
-        custom_config = r'--oem 3 --psm 6'
-        text = pytesseract.image_to_string(image, config=custom_config)
+            if verbose:
+                print(f"  Image size: {image.size}")
+                print(f"  Image mode: {image.mode}")
+
+            if max(image.size) > OCR_MAX_DIMENSION:
+                image.thumbnail((OCR_MAX_DIMENSION, OCR_MAX_DIMENSION), Image.LANCZOS)
+
+            # Flat tiles have nothing to read: don't start Tesseract for them
+            if _edge_variance(image) < BLANK_IMAGE_EDGE_VARIANCE:
+                return ''
+
+            if preprocess:
+                image = preprocess_image(image)
+
+        text = _ocr(image, psm)
 
         # Clean up whitespace
         lines = [line.strip() for line in text.split('\n') if line.strip()]
@@ -76,6 +292,43 @@ def extract_text_from_image(image_path, verbose=False):
         return f"ERROR: {e}"
 
 
+def _image_key(image_path, preprocess, psm):
+    """Cache key for an image's OCR text: hash of its bytes and the options used."""
+    with open(image_path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return f"{digest}:{'bin' if preprocess else 'raw'}:{OCR_MAX_DIMENSION}:psm{psm}"
+
+
+def default_cache_path(image_dir, image_paths):
+    """OCR cache file next to the images: in image_dir, else in the images' common directory."""
+    if not image_dir:
+        image_dir = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in image_paths])
+    return os.path.join(image_dir, OCR_CACHE_FILE)
+
+
+def load_ocr_cache(cache_path):
+    """Load the OCR result cache, or an empty one if missing or unreadable."""
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read OCR cache {cache_path}: {e}", file=sys.stderr)
+        return {}
+
+
+def save_ocr_cache(cache_path, cache):
+    """Write the OCR result cache via a temp file so it is never left half-written."""
+    tmp_path = cache_path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: Could not save OCR cache {cache_path}: {e}", file=sys.stderr)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Extract text from Lucidchart screenshots using OCR'
@@ -84,6 +337,17 @@ def main():
     parser.add_argument('--dir', help='Directory containing images to process')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     parser.add_argument('--json', action='store_true', help='Output as JSON')
+    parser.add_argument('--no-preprocess', action='store_false', dest='preprocess',
+                        help='OCR the image as-is instead of binarizing it first')
+    parser.add_argument('--psm', type=int, default=DEFAULT_PSM,
+                        help=f'Tesseract page segmentation mode (default: {DEFAULT_PSM}; '
+                             '11 = sparse text, often faster on diagrams)')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help='Parallel OCR processes (default: half the CPU cores)')
+    parser.add_argument('--cache',
+                        help=f'OCR result cache file (default: {OCR_CACHE_FILE} in the images directory)')
+    parser.add_argument('--no-cache', action='store_false', dest='use_cache',
+                        help="Don't read or write the OCR result cache")
 
     args = parser.parse_args()
 
@@ -92,8 +356,8 @@ def main():
 
     if args.images:
         for pattern in args.images:
-            # Handle glob patterns
-            matches = glob.glob(pattern)
+            # Handle glob patterns (plain paths skip the directory listing)
+            matches = glob.glob(pattern) if glob.has_magic(pattern) else []
             if matches:
                 image_paths.extend(matches)
             elif os.path.exists(pattern):
@@ -103,8 +367,11 @@ def main():
 
     if args.dir:
         if os.path.isdir(args.dir):
-            for ext in ['*.png', '*.jpg', '*.jpeg', '*.PNG', '*.JPG']:
-                image_paths.extend(glob.glob(os.path.join(args.dir, ext)))
+            # One listing, any extension case
+            with os.scandir(args.dir) as entries:
+                image_paths.extend(entry.path for entry in entries
+                                   if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+                                   and entry.is_file())
         else:
             print(f"Error: {args.dir} is not a directory", file=sys.stderr)
             sys.exit(1)
@@ -118,16 +385,52 @@ def main():
 
     print(f"Processing {len(image_paths)} image(s)...\n")
 
-    results = {}
-
-    for image_path in image_paths:
+    # Unchanged images were OCR'd on an earlier run: reuse their text
+    cache_path = None
+    if args.use_cache:
+        cache_path = args.cache or default_cache_path(args.dir, image_paths)
+    cache = load_ocr_cache(cache_path)
+    keys = {}
+    texts = {}
+    if cache_path:
+        for image_path in image_paths:
+            try:
+                keys[image_path] = _image_key(image_path, args.preprocess, args.psm)
+            except OSError:
+                continue
+            if keys[image_path] in cache:
+                texts[image_path] = cache[keys[image_path]]
+        if texts:
+            print(f"Reusing cached text for {len(texts)} image(s)\n")
+    pending = [image_path for image_path in image_paths if image_path not in texts]
+
+    # Images are independent and Tesseract is CPU-bound: OCR them in parallel,
+    # then print in the original order
+    extract = partial(extract_text_from_image, verbose=args.verbose, preprocess=args.preprocess,
+                      psm=args.psm)
+    workers = max(1, min(args.workers, len(pending)))
+    if workers == 1:
+        texts.update((image_path, extract(image_path)) for image_path in pending)
+    else:
+        # Warm workers pull one image at a time, so a few large images
+        # can't leave the rest of the pool idle at the end of the batch
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            futures = {executor.submit(extract, image_path): image_path for image_path in pending}
+            texts.update((futures[future], future.result()) for future in as_completed(futures))
+    results = {image_path: texts[image_path] for image_path in image_paths}
+
+    if cache_path and pending:
+        for image_path in pending:
+            text = results[image_path]
+            if image_path in keys and not text.startswith("ERROR"):
+                cache[keys[image_path]] = text
+        save_ocr_cache(cache_path, cache)
+
+    for image_path, text in results.items():
         print("=" * 60)
         print(f"FILE: {image_path}")
         print("=" * 60)
 
-        text = extract_text_from_image(image_path, verbose=args.verbose)
-        results[image_path] = text
-
         if text:
             print(text)
         else:
@@ -146,7 +449,6 @@ def main():
     print(f"Total characters: {total_chars}")
 
     if args.json:
-        import json
         print("\nJSON Output:")
         print(json.dumps(results, indent=2))
 
@@ -0,0 +1,62 @@
+"""
+Token bucket rate limiter for Confluence REST calls.
+
+Uses time.monotonic() so wall-clock adjustments (NTP) can't produce negative
+intervals. Offers a blocking acquire() for the sync extractors and an
+awaitable acquire_async() for asyncio callers; both keep the aggregate rate
+at `rate` requests/second while allowing a burst of up to `burst` requests.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Monotonic token bucket shared by sync and async callers."""
+
+    def __init__(self, rate, burst=1):
+        """
+        Args:
+            rate: Sustained requests per second
+            burst: Maximum tokens that can accumulate while idle
+        """
+        self.rate = float(rate)
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self._async_lock = None
+
+    def _reserve(self):
+        """
+        Take one token, refilling first.
+
+        Returns:
+            float: Seconds the caller must wait before proceeding (0 if none)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+
+            # Going negative reserves the token; the deficit is the wait time
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block until a request may be made."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a request may be made."""
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
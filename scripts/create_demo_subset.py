@@ -13,6 +13,7 @@ Ensures every diagram in the demo has a preview image.
 import os
 import shutil
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 # Paths
 PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -25,6 +26,18 @@ TARGET_SPACES = 15  # Number of spaces to include
 # First space gets 200, second 180, etc. down to ~50 for last
 DIAGRAM_CAPS = [200, 180, 160, 140, 120, 110, 100, 90, 80, 70, 65, 60, 55, 50, 45]
 
+# Concurrent copy operations; small-file IO is syscall-latency bound
+COPY_THREADS = 32
+
+
+def _file_names(directory):
+    """Names of the files in a directory (empty if it doesn't exist)."""
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+    except OSError:
+        return set()
+
 
 def find_complete_diagrams():
     """Find diagrams that have both PNG and metadata JSON."""
@@ -46,25 +59,30 @@ def find_complete_diagrams():
         if not os.path.isdir(space_images):
             continue
 
-        for png_file in os.listdir(space_images):
-            if not png_file.endswith('.png'):
-                continue
+        # One listing per directory instead of an exists() check per file
+        metadata_names = _file_names(space_metadata)
+        drawio_names = _file_names(space_diagrams)
 
-            diagram_name = png_file[:-4]  # Remove .png
+        with os.scandir(space_images) as entries:
+            for entry in entries:
+                png_file = entry.name
+                if not png_file.endswith('.png') or not entry.is_file():
+                    continue
 
-            # Check files exist
-            png_path = os.path.join(space_images, png_file)
-            meta_path = os.path.join(space_metadata, f"{diagram_name}.png.json")
-            drawio_path = os.path.join(space_diagrams, f"{diagram_name}.drawio")
+                diagram_name = png_file[:-4]  # Remove .png
 
-            # PNG is required, metadata is required, drawio is optional
-            if os.path.exists(png_path) and os.path.exists(meta_path):
+                # PNG is required, metadata is required, drawio is optional
+                meta_file = f"{diagram_name}.png.json"
+                if meta_file not in metadata_names:
+                    continue
+
+                drawio_file = f"{diagram_name}.drawio"
                 results[space_key].append({
                     'name': diagram_name,
-                    'png': png_path,
-                    'metadata': meta_path,
-                    'drawio': drawio_path if os.path.exists(drawio_path) else None,
-                    'size': os.path.getsize(png_path)
+                    'png': entry.path,
+                    'metadata': os.path.join(space_metadata, meta_file),
+                    'drawio': os.path.join(space_diagrams, drawio_file) if drawio_file in drawio_names else None,
+                    'size': entry.stat().st_size
                 })
 
     return results
@@ -104,6 +122,7 @@ def create_demo_structure(selected_spaces):
     os.makedirs(diagrams_dir, exist_ok=True)
 
     total_copied = 0
+    copies = []  # (src, dst) pairs, copied concurrently below
 
     for space_key, diagrams in selected_spaces.items():
         os.makedirs(os.path.join(images_dir, space_key), exist_ok=True)
@@ -115,21 +134,25 @@ def create_demo_structure(selected_spaces):
 
             # Copy PNG
             dst_png = os.path.join(images_dir, space_key, f"{name}.png")
-            shutil.copy2(diagram['png'], dst_png)
+            copies.append((diagram['png'], dst_png))
 
             # Copy metadata
             dst_meta = os.path.join(metadata_dir, space_key, f"{name}.png.json")
-            shutil.copy2(diagram['metadata'], dst_meta)
+            copies.append((diagram['metadata'], dst_meta))
 
             # Copy drawio if exists
             if diagram['drawio']:
                 dst_drawio = os.path.join(diagrams_dir, space_key, f"{name}.drawio")
-                shutil.copy2(diagram['drawio'], dst_drawio)
+                copies.append((diagram['drawio'], dst_drawio))
 
             total_copied += 1
 
         print(f"  {space_key}: {len(diagrams)} diagrams")
 
+    with ThreadPoolExecutor(max_workers=COPY_THREADS) as executor:
+        # list() re-raises the first failed copy
+        list(executor.map(lambda pair: shutil.copy2(*pair), copies))
+
     return total_copied
 
 
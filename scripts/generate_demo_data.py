@@ -21,7 +21,10 @@ import sqlite3
 import base64
 import zlib
 import subprocess
+import tempfile
+import heapq
 from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
 from urllib.parse import unquote
@@ -37,11 +40,26 @@ PROJECT_DIR = os.path.dirname(SCRIPT_DIR)
 OUTPUT_DIR = os.path.join(PROJECT_DIR, "data", "content")
 DB_PATH = os.path.join(PROJECT_DIR, "data", "diagrams.db")
 
+# Content keywords per source file, reused while the file's mtime and size
+# match: {path: [mtime_ns, size, keywords]}. Survives --clean on purpose
+KEYWORD_CACHE_FILE = os.path.join(PROJECT_DIR, "data", ".keyword_cache.json")
+# Bump when keyword extraction or STOPWORDS change, to discard old entries
+KEYWORD_CACHE_VERSION = 1
+
 # Draw.io executable for PNG generation
 DRAWIO_EXE = "/mnt/c/Program Files/draw.io/draw.io.exe"
 
+# File copies are I/O-bound (the GIL is released in the syscalls); each
+# draw.io export is a whole process, so those get one slot per core
+COPY_THREADS = 32
+RENDER_THREADS = os.cpu_count() or 4
+
+# Fewest diagrams per draw.io run: each run pays the Electron startup
+RENDER_MIN_BATCH = 25
+
 # Comprehensive stopwords - these will NEVER become space names
-STOPWORDS = {
+# (words under 3 letters never reach the lookup; they are dropped by length first)
+STOPWORDS = frozenset({
     # Years
     '2014', '2015', '2016', '2017', '2018', '2019', '2020', '2021', '2022', '2023', '2024', '2025', '2026',
     # Common English words
@@ -92,15 +110,29 @@ STOPWORDS = {
     'input', 'output', 'return', 'returns', 'result', 'results',
     'cluster', 'group', 'category', 'section', 'part', 'component', 'module',
     'thing', 'things', 'stuff', 'data', 'info', 'information',
-    # Single letters and common short words
-    'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm',
-    'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z',
+    # Common short words
     'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
-}
+})
 
 # Number of target spaces (will be adjusted based on data)
 TARGET_SPACES = 80
 
+# Keyword extraction patterns (compiled once; run on every one of ~81K files)
+_CAMEL_CASE_RE = re.compile(r'([a-z])([A-Z])')
+_NON_ALPHA_RE = re.compile(r'[^a-zA-Z\s]')
+# Same as _NON_ALPHA_RE for ASCII text, as a single str.translate pass
+_ASCII_NON_ALPHA = str.maketrans({
+    chr(i): ' ' for i in range(128) if not (chr(i).isalpha() or chr(i).isspace())
+})
+# File-level patterns match raw bytes; only the captured groups get decoded
+_DIAGRAM_NAME_RE = re.compile(rb'<diagram[^>]*name="([^"]*)"')
+_DIAGRAM_BODY_RE = re.compile(rb'<diagram[^>]*>([^<]+)</diagram>')
+_VALUE_ATTR_RE = re.compile(r'value="([^"]*)"')
+_MXCELL_VALUE_RE = re.compile(rb'<mxCell[^>]*value="([^"]*)"')
+# HTML tags and entities, stripped in one pass
+_MARKUP_RE = re.compile(r'<[^>]+>|&[#a-zA-Z0-9]+;')
+_CSS_DECL_RE = re.compile(r'[a-z-]+:\s*[^;]+;')
+
 
 def parse_filename(filename):
     """
@@ -114,13 +146,11 @@ def parse_filename(filename):
     else:
         return None
 
-    parts = base.split('--')
+    parts = base.rsplit('--', 2)
     if len(parts) < 3:
         return None
 
-    repo = parts[-1]
-    owner = parts[-2]
-    diagram_name = '--'.join(parts[:-2])
+    diagram_name, owner, repo = parts
 
     if diagram_name.endswith('.drawio'):
         diagram_name = diagram_name[:-7]
@@ -130,34 +160,34 @@ def parse_filename(filename):
 
 def extract_keywords_from_name(name):
     """Extract meaningful keywords from a diagram/file name."""
-    # Replace separators with spaces
-    text = re.sub(r'[-_./\\]', ' ', name)
     # Split camelCase
-    text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
-    # Remove non-alpha
-    text = re.sub(r'[^a-zA-Z\s]', ' ', text)
+    text = _CAMEL_CASE_RE.sub(r'\1 \2', name)
+    # Replace separators and every other non-alpha with spaces
+    text = text.translate(_ASCII_NON_ALPHA) if text.isascii() else _NON_ALPHA_RE.sub(' ', text)
     # Lowercase and split
     words = text.lower().split()
     # Filter stopwords and short words (< 3 chars)
-    return [w for w in words if w not in STOPWORDS and len(w) >= 3]
+    return [w for w in words if len(w) >= 3 and w not in STOPWORDS]
 
 
 def extract_keywords_from_drawio(filepath):
     """Extract keywords from DrawIO file content."""
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+        # Bytes: no full-file UTF-8 decode, just the (small) matches below
+        with open(filepath, 'rb') as f:
             content = f.read()
 
         keywords = []
 
         # Extract diagram names
-        for match in re.finditer(r'<diagram[^>]*name="([^"]*)"', content):
-            name = match.group(1)
+        for match in _DIAGRAM_NAME_RE.finditer(content):
+            name = match.group(1).decode('utf-8', 'ignore')
             if name:
                 keywords.extend(extract_keywords_from_name(name))
 
-        # Try to decode compressed content
-        for match in re.finditer(r'<diagram[^>]*>([^<]+)</diagram>', content):
+        # Try to decode compressed content. _DIAGRAM_BODY_RE only matches bodies
+        # without '<', so uncompressed <mxGraphModel> diagrams never get here
+        for match in _DIAGRAM_BODY_RE.finditer(content):
             compressed_data = match.group(1).strip()
             if compressed_data:
                 try:
@@ -166,23 +196,22 @@ def extract_keywords_from_drawio(filepath):
                     xml_content = unquote(decompressed.decode('utf-8'))
 
                     # Extract value attributes from mxCell elements
-                    for cell_match in re.finditer(r'value="([^"]*)"', xml_content):
+                    for cell_match in _VALUE_ATTR_RE.finditer(xml_content):
                         value = cell_match.group(1)
                         if value:
                             # Strip HTML and extract text
-                            clean = re.sub(r'<[^>]+>', ' ', value)
-                            clean = re.sub(r'&[#a-zA-Z0-9]+;', ' ', clean)
-                            clean = re.sub(r'[a-z-]+:\s*[^;]+;', ' ', clean)
+                            # CSS runs last: an entity's ';' must not end a declaration early
+                            clean = _MARKUP_RE.sub(' ', value)
+                            clean = _CSS_DECL_RE.sub(' ', clean)
                             keywords.extend(extract_keywords_from_name(clean))
                 except Exception:
                     pass
 
         # Also check uncompressed mxCell values
-        for match in re.finditer(r'<mxCell[^>]*value="([^"]*)"', content):
-            value = match.group(1)
+        for match in _MXCELL_VALUE_RE.finditer(content):
+            value = match.group(1).decode('utf-8', 'ignore')
             if value:
-                clean = re.sub(r'<[^>]+>', ' ', value)
-                clean = re.sub(r'&[#a-zA-Z0-9]+;', ' ', clean)
+                clean = _MARKUP_RE.sub(' ', value)
                 keywords.extend(extract_keywords_from_name(clean))
 
         return keywords
@@ -190,7 +219,34 @@ def extract_keywords_from_drawio(filepath):
         return []
 
 
-def cluster_by_keywords(diagrams, target_spaces=TARGET_SPACES):
+def load_keyword_cache(cache_path):
+    """Load the content keyword cache, or an empty one if missing, unreadable or outdated."""
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"  Warning: Could not read keyword cache {cache_path}: {e}")
+        return {}
+    if cache.get('version') != KEYWORD_CACHE_VERSION:
+        return {}
+    return cache.get('files', {})
+
+
+def save_keyword_cache(cache_path, files):
+    """Write the content keyword cache via a temp file so it is never left half-written."""
+    tmp_path = cache_path + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': KEYWORD_CACHE_VERSION, 'files': files}, f, separators=(',', ':'))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"  Warning: Could not save keyword cache {cache_path}: {e}")
+
+
+def cluster_by_keywords(diagrams, target_spaces=TARGET_SPACES, cache_path=KEYWORD_CACHE_FILE):
     """
     Cluster diagrams by their most distinctive keyword.
 
@@ -199,31 +255,65 @@ def cluster_by_keywords(diagrams, target_spaces=TARGET_SPACES):
     2. For each diagram, find its most distinctive keyword (present but not too common)
     3. Group diagrams by their top keyword
     4. Merge small groups, split large groups to hit target_spaces
+
+    Content keywords are cached in cache_path (None to disable), so re-runs
+    only read the source files that changed.
     """
     print(f"\nClustering {len(diagrams)} diagrams by keyword...")
 
     # Count keywords across all diagrams
     global_keyword_counts = Counter()
-    diagram_keywords = {}
-
+    diagram_keywords = [None] * len(diagrams)  # indexed like diagrams
+
+    # Unchanged source files keep their keywords from the last run; a missing
+    # file yields no keywords. Entries for files no longer present are dropped
+    cache = load_keyword_cache(cache_path)
+    fresh_cache = {}
+    all_content_keywords = [[]] * len(diagrams)
+    pending = []
     for idx, d in enumerate(diagrams):
-        if idx % 10000 == 0:
-            print(f"  Extracting keywords: {idx}/{len(diagrams)}")
-
+        drawio_path = d[4]
+        if not drawio_path:
+            continue
+        try:
+            st = os.stat(drawio_path)
+        except OSError:
+            continue
+        entry = cache.get(drawio_path)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            fresh_cache[drawio_path] = entry
+            all_content_keywords[idx] = entry[2]
+        else:
+            pending.append((idx, drawio_path, st))
+
+    if cache_path:
+        print(f"  Reusing cached keywords for {len(fresh_cache)} files, extracting {len(pending)}")
+
+    # Reading and decoding the source files dominates: spread it over all cores
+    # (results come back in order)
+    if pending:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(extract_keywords_from_drawio, [p[1] for p in pending], chunksize=64)
+            for n, ((idx, drawio_path, st), content_keywords) in enumerate(zip(pending, results)):
+                if n % 10000 == 0:
+                    print(f"  Extracting keywords: {n}/{len(pending)}")
+                all_content_keywords[idx] = content_keywords
+                fresh_cache[drawio_path] = [st.st_mtime_ns, st.st_size, content_keywords]
+
+    if cache_path and (pending or len(fresh_cache) != len(cache)):
+        save_keyword_cache(cache_path, fresh_cache)
+
+    for idx, (d, content_keywords) in enumerate(zip(diagrams, all_content_keywords)):
         diagram_name, owner, repo, png_path, drawio_path = d
 
-        # Get keywords from name (weighted higher)
+        # Get keywords from name (weighted higher at assignment time)
         name_keywords = extract_keywords_from_name(diagram_name)
+        diagram_keywords[idx] = (name_keywords, content_keywords)
 
-        # Get keywords from content
-        content_keywords = []
-        if drawio_path and os.path.exists(drawio_path):
-            content_keywords = extract_keywords_from_drawio(drawio_path)
-
-        # Weight name keywords higher (appear 3x)
-        all_keywords = name_keywords * 3 + content_keywords
-        diagram_keywords[idx] = all_keywords
-        global_keyword_counts.update(set(all_keywords))  # Count unique per diagram
+        # Count unique per diagram
+        unique_keywords = set(name_keywords)
+        unique_keywords.update(content_keywords)
+        global_keyword_counts.update(unique_keywords)
 
     print(f"  Found {len(global_keyword_counts)} unique keywords")
 
@@ -247,35 +337,35 @@ def cluster_by_keywords(diagrams, target_spaces=TARGET_SPACES):
         }
         print(f"  Relaxed to {len(good_keywords)} keywords")
 
-    # Assign each diagram to its best keyword
-    assignments = {}
-    for idx, keywords in diagram_keywords.items():
+    # Assign each diagram to its best keyword, grouping as we go
+    groups = defaultdict(list)
+    for idx, (name_keywords, content_keywords) in enumerate(diagram_keywords):
         # Find the most specific (lowest frequency) good keyword for this diagram
         best_keyword = None
         best_score = float('inf')
 
-        for kw in keywords:
-            if kw in good_keywords:
-                score = global_keyword_counts[kw]
-                if score < best_score:
-                    best_score = score
-                    best_keyword = kw
+        for keywords in (name_keywords, content_keywords):
+            for kw in keywords:
+                if kw in good_keywords:
+                    score = global_keyword_counts[kw]
+                    if score < best_score:
+                        best_score = score
+                        best_keyword = kw
 
         if best_keyword:
-            assignments[idx] = best_keyword
+            groups[best_keyword].append(idx)
         else:
             # No good keyword found - use most common keyword from this diagram
-            if keywords:
-                kw_counts = Counter(keywords)
+            if name_keywords or content_keywords:
+                # Name keywords count 3x
+                kw_counts = Counter()
+                for kw in name_keywords:
+                    kw_counts[kw] += 3
+                kw_counts.update(content_keywords)
                 most_common = kw_counts.most_common(1)[0][0]
-                assignments[idx] = most_common
+                groups[most_common].append(idx)
             else:
-                assignments[idx] = 'miscellaneous'
-
-    # Group by assignment
-    groups = defaultdict(list)
-    for idx, keyword in assignments.items():
-        groups[keyword].append(idx)
+                groups['miscellaneous'].append(idx)
 
     print(f"  Initial grouping: {len(groups)} groups")
 
@@ -307,20 +397,32 @@ def cluster_by_keywords(diagrams, target_spaces=TARGET_SPACES):
     if misc_diagrams:
         random.shuffle(misc_diagrams)
         group_keys = list(final_groups.keys())
-        for i, idx in enumerate(misc_diagrams):
-            target_group = group_keys[i % len(group_keys)]
-            final_groups[target_group].append(idx)
+        # Round-robin: group k gets every n-th diagram starting at k
+        n = len(group_keys)
+        for k, target_group in enumerate(group_keys):
+            final_groups[target_group].extend(misc_diagrams[k::n])
+
+    # Now merge smallest groups until we hit target_spaces. Min-heap on
+    # (size, original position) so ties go to the earlier group; entries whose
+    # group has since grown are stale and skipped when popped
+    position = {key: i for i, key in enumerate(final_groups)}
+    heap = [(len(indices), position[key], key) for key, indices in final_groups.items()]
+    heapq.heapify(heap)
+
+    def pop_smallest():
+        while True:
+            size, _, key = heapq.heappop(heap)
+            if len(final_groups[key]) == size:
+                return key
 
-    # Now merge smallest groups until we hit target_spaces
     while len(final_groups) > target_spaces:
         # Find the two smallest groups and merge them
-        sorted_by_size = sorted(final_groups.items(), key=lambda x: len(x[1]))
-        smallest_key, smallest_indices = sorted_by_size[0]
-        second_key, second_indices = sorted_by_size[1]
+        smallest_key = pop_smallest()
+        second_key = pop_smallest()
 
         # Merge into the second smallest (keeps the name)
-        final_groups[second_key].extend(smallest_indices)
-        del final_groups[smallest_key]
+        final_groups[second_key].extend(final_groups.pop(smallest_key))
+        heapq.heappush(heap, (len(final_groups[second_key]), position[second_key], second_key))
 
     print(f"  Final: {len(final_groups)} groups")
 
@@ -332,33 +434,68 @@ def cluster_by_keywords(diagrams, target_spaces=TARGET_SPACES):
     return final_groups
 
 
-def generate_png(drawio_path, output_png_path, timeout=30):
-    """Generate PNG from DrawIO file using draw.io.exe."""
-    if not os.path.exists(DRAWIO_EXE):
-        return False
+def _to_windows_path(path):
+    """Convert a WSL path to a Windows path for draw.io.exe."""
+    if path.startswith('/mnt/c/'):
+        return 'C:' + path[6:].replace('/', '\\')
+    return path
 
-    try:
-        # Convert WSL path to Windows path for draw.io.exe
-        def to_windows_path(path):
-            if path.startswith('/mnt/c/'):
-                return 'C:' + path[6:].replace('/', '\\')
-            return path
 
-        win_input = to_windows_path(drawio_path)
-        win_output = to_windows_path(output_png_path)
+def generate_png_batch(drawio_paths, output_dir, timeout=30):
+    """
+    Generate PNGs from DrawIO files with a single draw.io.exe run.
+
+    draw.io exports a whole folder in one process, so Electron starts once
+    per batch instead of once per diagram. The batch is staged in its own
+    folder so diagrams that already have a PNG aren't re-exported.
+
+    Args:
+        drawio_paths: {PNG file name to write: source .drawio path}
+        output_dir: Directory the PNGs end up in
+        timeout: Seconds allowed per diagram
+
+    Returns:
+        Set of PNG file names written to output_dir
+    """
+    if not drawio_paths or not os.path.exists(DRAWIO_EXE):
+        return set()
+
+    generated = set()
+    try:
+        # Staged beside the output, where draw.io.exe can reach it
+        with tempfile.TemporaryDirectory(prefix='.render-', dir=output_dir) as staging:
+            staged_input = os.path.join(staging, 'in')
+            staged_output = os.path.join(staging, 'out')
+            os.makedirs(staged_input)
+            os.makedirs(staged_output)
+            for png_name, drawio_path in drawio_paths.items():
+                shutil.copyfile(drawio_path, os.path.join(staged_input, f"{png_name[:-4]}.drawio"))
+
+            cmd = [
+                DRAWIO_EXE,
+                '-x',  # export mode
+                '-f', 'png',  # format
+                '-o', _to_windows_path(staged_output),
+                _to_windows_path(staged_input)
+            ]
 
-        cmd = [
-            DRAWIO_EXE,
-            '-x',  # export mode
-            '-f', 'png',  # format
-            '-o', win_output,
-            win_input
-        ]
+            try:
+                subprocess.run(cmd, capture_output=True, timeout=timeout * len(drawio_paths))
+            except subprocess.TimeoutExpired:
+                pass  # keep whatever was exported before the timeout
+
+            for png_name in drawio_paths:
+                # Folder exports are named after the input, with or without its extension
+                for exported in (png_name, f"{png_name[:-4]}.drawio.png"):
+                    exported_path = os.path.join(staged_output, exported)
+                    if os.path.exists(exported_path):
+                        os.replace(exported_path, os.path.join(output_dir, png_name))
+                        generated.add(png_name)
+                        break
+    except Exception:
+        pass
 
-        result = subprocess.run(cmd, capture_output=True, timeout=timeout)
-        return os.path.exists(output_png_path)
-    except Exception as e:
-        return False
+    return generated
 
 
 def scan_available_files():
@@ -366,31 +503,36 @@ def scan_available_files():
     print("Scanning source directories...")
 
     # Get all PNG files
+    # scandir: entries carry a ready-made path, no list of 100K+ names or joins
     png_files = {}
-    for f in os.listdir(SOURCE_DIR):
-        if f.endswith('.png'):
-            parsed = parse_filename(f)
+    with os.scandir(SOURCE_DIR) as entries:
+        for entry in entries:
+            name = entry.name
+            if not name.endswith('.png'):
+                continue
+            parsed = parse_filename(name)
             if parsed:
-                key = (parsed[0], parsed[1], parsed[2])
-                png_files[key] = os.path.join(SOURCE_DIR, f)
+                png_files[parsed] = entry.path
 
     print(f"  Found {len(png_files)} PNG files")
 
     # Get all DrawIO files
     all_diagrams = []
     if os.path.exists(DRAWIO_DIR):
-        drawio_files = [f for f in os.listdir(DRAWIO_DIR) if f.endswith('.drawio')]
-        print(f"  Found {len(drawio_files)} DrawIO files")
-
-        for f in drawio_files:
-            parsed = parse_filename(f)
-            if parsed:
-                diagram_name, owner, repo = parsed
-                drawio_path = os.path.join(DRAWIO_DIR, f)
-                key = (diagram_name, owner, repo)
-                png_path = png_files.get(key)
-
-                all_diagrams.append((diagram_name, owner, repo, png_path, drawio_path))
+        drawio_count = 0
+        with os.scandir(DRAWIO_DIR) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.endswith('.drawio'):
+                    continue
+                drawio_count += 1
+                parsed = parse_filename(name)
+                if parsed:
+                    diagram_name, owner, repo = parsed
+                    png_path = png_files.get(parsed)
+
+                    all_diagrams.append((diagram_name, owner, repo, png_path, entry.path))
+        print(f"  Found {drawio_count} DrawIO files")
 
     print(f"  Total diagrams: {len(all_diagrams)}")
     print(f"  Diagrams with PNG: {sum(1 for d in all_diagrams if d[3])}")
@@ -398,6 +540,45 @@ def scan_available_files():
     return all_diagrams
 
 
+def _file_sizes(directory):
+    """Sizes of the files in a directory by name (empty if it doesn't exist)."""
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name: entry.stat().st_size for entry in entries if entry.is_file()}
+    except OSError:
+        return {}
+
+
+def _place_diagram_files(png_path, dst_png, drawio_path, dst_drawio):
+    """
+    Copy one diagram's PNG and its .drawio alongside.
+
+    Args:
+        png_path: Source PNG to copy, or None
+        dst_png: Destination PNG path
+        drawio_path: Source .drawio to copy, or None to leave it out
+        dst_drawio: Destination .drawio path
+
+    Returns:
+        'copied' if the PNG was written, else None
+    """
+    result = None
+    if png_path:
+        try:
+            shutil.copy2(png_path, dst_png)
+            result = 'copied'
+        except Exception:
+            pass
+
+    if drawio_path:
+        try:
+            shutil.copy2(drawio_path, dst_drawio)
+        except Exception:
+            pass
+
+    return result
+
+
 def create_output_structure(diagrams, groups, generate_pngs=False, limit=None):
     """Create the SuperSearch directory structure from grouped data."""
 
@@ -416,95 +597,126 @@ def create_output_structure(diagrams, groups, generate_pngs=False, limit=None):
     pngs_generated = 0
     pngs_copied = 0
 
-    for space_key, indices in groups.items():
-        if limit and total_processed >= limit:
-            break
-
-        space_counts[space_key] = 0
-
-        # Create space directories
-        space_diagrams = os.path.join(diagrams_dir, space_key)
-        space_images = os.path.join(images_dir, space_key)
-        space_metadata = os.path.join(metadata_dir, space_key)
-
-        os.makedirs(space_diagrams, exist_ok=True)
-        os.makedirs(space_images, exist_ok=True)
-        os.makedirs(space_metadata, exist_ok=True)
-
-        for idx in indices:
+    with ThreadPoolExecutor(max_workers=COPY_THREADS) as copy_executor, \
+            ThreadPoolExecutor(max_workers=RENDER_THREADS) as render_executor:
+        for space_key, indices in groups.items():
             if limit and total_processed >= limit:
                 break
 
-            diagram_name, owner, repo, png_path, drawio_path = diagrams[idx]
-
-            # Sanitize diagram name for filesystem
-            safe_name = re.sub(r'[<>:"/\\|?*]', '_', diagram_name)
-            safe_name = safe_name[:200]
-
-            dst_png = os.path.join(space_images, f"{safe_name}.png")
-            dst_drawio = os.path.join(space_diagrams, f"{safe_name}.drawio")
-
-            # Handle PNG
-            has_png = False
-            if png_path and os.path.exists(png_path):
-                if not os.path.exists(dst_png):
-                    try:
-                        shutil.copy2(png_path, dst_png)
+            space_counts[space_key] = 0
+
+            # Create space directories
+            space_diagrams = os.path.join(diagrams_dir, space_key)
+            space_images = os.path.join(images_dir, space_key)
+            space_metadata = os.path.join(metadata_dir, space_key)
+
+            os.makedirs(space_diagrams, exist_ok=True)
+            os.makedirs(space_images, exist_ok=True)
+            os.makedirs(space_metadata, exist_ok=True)
+
+            # One listing per space instead of stat calls per diagram; sources
+            # come straight from scan_available_files' directory listing
+            existing_pngs = set(_file_sizes(space_images))
+            existing_drawios = set(_file_sizes(space_diagrams))
+
+            # Copies and renders run on the pools a batch at a time; results are
+            # then taken in order so ids, dates and the limit come out as before.
+            # A batch never holds more diagrams than the limit still allows
+            pos = 0
+            while pos < len(indices) and not (limit and total_processed >= limit):
+                batch_size = len(indices) - pos
+                if limit:
+                    batch_size = min(batch_size, limit - total_processed)
+                batch = indices[pos:pos + batch_size]
+                pos += batch_size
+
+                jobs = []
+                to_render = {}
+                for idx in batch:
+                    diagram_name, owner, repo, png_path, drawio_path = diagrams[idx]
+
+                    # Sanitize diagram name for filesystem
+                    safe_name = re.sub(r'[<>:"/\\|?*]', '_', diagram_name)
+                    safe_name = safe_name[:200]
+
+                    png_name = f"{safe_name}.png"
+                    drawio_name = f"{safe_name}.drawio"
+
+                    # Existing destinations are kept; names are claimed as soon as
+                    # a copy is queued so a duplicate name isn't copied twice
+                    copy_png = png_path if png_path and png_name not in existing_pngs else None
+                    if not png_path and generate_pngs and drawio_path:
+                        to_render[png_name] = drawio_path
+                    copy_drawio = drawio_path if drawio_path and drawio_name not in existing_drawios else None
+                    # Counted without a new PNG if one is already in place
+                    has_png = png_name in existing_pngs
+                    if copy_png:
+                        existing_pngs.add(png_name)
+                    if copy_drawio:
+                        existing_drawios.add(drawio_name)
+
+                    future = None
+                    if copy_png or copy_drawio:
+                        future = copy_executor.submit(_place_diagram_files, copy_png,
+                                                      os.path.join(space_images, png_name),
+                                                      copy_drawio, os.path.join(space_diagrams, drawio_name))
+                    jobs.append((diagram_name, owner, repo, safe_name, png_name, has_png, copy_png, future))
+
+                # Missing PNGs are exported a few draw.io runs per batch, in parallel
+                render_items = list(to_render.items())
+                render_size = max(RENDER_MIN_BATCH, -(-len(render_items) // RENDER_THREADS))
+                render_futures = [
+                    render_executor.submit(generate_png_batch, dict(render_items[i:i + render_size]), space_images)
+                    for i in range(0, len(render_items), render_size)
+                ]
+                generated = set()
+                for render_future in render_futures:
+                    generated.update(render_future.result())
+                existing_pngs.update(generated)
+
+                for diagram_name, owner, repo, safe_name, png_name, has_png, copy_png, future in jobs:
+                    result = future.result() if future else None
+                    if result == 'copied':
                         pngs_copied += 1
                         has_png = True
-                    except Exception:
-                        pass
-                else:
-                    has_png = True
-            elif generate_pngs and drawio_path and os.path.exists(drawio_path):
-                # Try to generate PNG
-                if generate_png(drawio_path, dst_png):
-                    pngs_generated += 1
-                    has_png = True
-
-            # Skip if no PNG and we require it
-            if not has_png and not os.path.exists(dst_png):
-                # Still copy the drawio for completeness, but don't count
-                if drawio_path and os.path.exists(drawio_path) and not os.path.exists(dst_drawio):
-                    try:
-                        shutil.copy2(drawio_path, dst_drawio)
-                    except Exception:
-                        pass
-                continue
-
-            # Copy DrawIO
-            if drawio_path and os.path.exists(drawio_path) and not os.path.exists(dst_drawio):
-                try:
-                    shutil.copy2(drawio_path, dst_drawio)
-                except Exception:
-                    pass
-
-            # Generate metadata
-            diagram_id = total_processed + 1000
-            days_ago = random.randint(1, 730)
-            created_date = datetime.now() - timedelta(days=days_ago)
-
-            metadata = {
-                'id': str(diagram_id),
-                'title': f"{diagram_name}.png",
-                'space': {'key': space_key},
-                '_expandable': {'container': f'/rest/api/content/{diagram_id}'},
-                'version': {'number': random.randint(1, 10)},
-                'metadata': {'github_owner': owner, 'github_repo': repo},
-                '_links': {'download': f'/download/{space_key}/{safe_name}.png'},
-                'created_date': created_date.strftime('%Y-%m-%d'),
-                'author_display': f"{owner}/{repo}" if owner and repo else owner,
-            }
-
-            meta_path = os.path.join(space_metadata, f"{safe_name}.png.json")
-            with open(meta_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2)
-
-            space_counts[space_key] += 1
-            total_processed += 1
-
-            if total_processed % 1000 == 0:
-                print(f"  Progress: {total_processed} processed, {pngs_copied} copied, {pngs_generated} generated")
+                    elif png_name in generated:
+                        pngs_generated += 1
+                        has_png = True
+                    elif copy_png:
+                        # The queued copy failed: the name is free again
+                        existing_pngs.discard(png_name)
+
+                    # Skip if no PNG and we require it (don't count it)
+                    if not has_png:
+                        continue
+
+                    # Generate metadata
+                    diagram_id = total_processed + 1000
+                    days_ago = random.randint(1, 730)
+                    created_date = datetime.now() - timedelta(days=days_ago)
+
+                    metadata = {
+                        'id': str(diagram_id),
+                        'title': f"{diagram_name}.png",
+                        'space': {'key': space_key},
+                        '_expandable': {'container': f'/rest/api/content/{diagram_id}'},
+                        'version': {'number': random.randint(1, 10)},
+                        'metadata': {'github_owner': owner, 'github_repo': repo},
+                        '_links': {'download': f'/download/{space_key}/{safe_name}.png'},
+                        'created_date': created_date.strftime('%Y-%m-%d'),
+                        'author_display': f"{owner}/{repo}" if owner and repo else owner,
+                    }
+
+                    # Compact, in one write: indent=2 drops json off its C encoder
+                    meta_path = os.path.join(space_metadata, f"{safe_name}.png.json")
+                    with open(meta_path, 'w', encoding='utf-8') as f:
+                        f.write(json.dumps(metadata, separators=(',', ':')))
+
+                    space_counts[space_key] += 1
+                    total_processed += 1
+
+                    if total_processed % 1000 == 0:
+                        print(f"  Progress: {total_processed} processed, {pngs_copied} copied, {pngs_generated} generated")
 
     print(f"\nCreated {len(space_counts)} spaces with {total_processed} diagrams")
     print(f"  PNGs copied: {pngs_copied}")
@@ -530,6 +742,10 @@ def create_database(space_counts):
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
 
+    # Freshly generated file that is rebuilt on failure: no rollback journal or fsyncs needed
+    cursor.execute('PRAGMA journal_mode=MEMORY')
+    cursor.execute('PRAGMA synchronous=OFF')
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS diagrams (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -549,19 +765,20 @@ def create_database(space_counts):
         )
     ''')
 
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_space ON diagrams(space_key)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_name ON diagrams(diagram_name)')
-
     metadata_dir = os.path.join(OUTPUT_DIR, 'metadata')
     diagrams_dir = os.path.join(OUTPUT_DIR, 'diagrams')
     images_dir = os.path.join(OUTPUT_DIR, 'images')
-    record_count = 0
+    rows = []
 
     for space_key in os.listdir(metadata_dir):
         space_path = os.path.join(metadata_dir, space_key)
         if not os.path.isdir(space_path):
             continue
 
+        # One listing per space for both existence checks and image sizes
+        image_sizes = _file_sizes(os.path.join(images_dir, space_key))
+        drawio_names = _file_sizes(os.path.join(diagrams_dir, space_key))
+
         for meta_file in os.listdir(space_path):
             if not meta_file.endswith('.json'):
                 continue
@@ -575,21 +792,13 @@ def create_database(space_counts):
                 drawio_path = os.path.join(diagrams_dir, space_key, f'{diagram_name}.drawio')
                 image_path = os.path.join(images_dir, space_key, f'{diagram_name}.png')
 
-                file_size = 0
-                if os.path.exists(image_path):
-                    file_size = os.path.getsize(image_path)
+                file_size = image_sizes.get(f'{diagram_name}.png', 0)
 
                 github_owner = meta.get('metadata', {}).get('github_owner', '')
                 github_repo = meta.get('metadata', {}).get('github_repo', '')
                 author_display = f"{github_owner}/{github_repo}" if github_owner and github_repo else github_owner
 
-                cursor.execute('''
-                    INSERT INTO diagrams
-                    (space_key, diagram_name, page_title, page_id, confluence_page_url,
-                     author, author_display, created_date, file_size, drawio_path,
-                     image_path, metadata_path, content_text)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                rows.append((
                     space_key,
                     diagram_name,
                     diagram_name,
@@ -599,16 +808,28 @@ def create_database(space_counts):
                     author_display,
                     meta.get('created_date', ''),
                     file_size,
-                    drawio_path if os.path.exists(drawio_path) else '',
-                    image_path if os.path.exists(image_path) else '',
+                    drawio_path if f'{diagram_name}.drawio' in drawio_names else '',
+                    image_path if f'{diagram_name}.png' in image_sizes else '',
                     meta_path,
                     ''
                 ))
-                record_count += 1
 
             except Exception as e:
                 print(f"  Error processing {meta_path}: {e}")
 
+    # One bulk insert, then build the indexes once over the full table
+    cursor.executemany('''
+        INSERT INTO diagrams
+        (space_key, diagram_name, page_title, page_id, confluence_page_url,
+         author, author_display, created_date, file_size, drawio_path,
+         image_path, metadata_path, content_text)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    record_count = len(rows)
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_space ON diagrams(space_key)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_name ON diagrams(diagram_name)')
+
     conn.commit()
     conn.close()
 
@@ -626,6 +847,8 @@ def main():
     parser.add_argument('--clean', action='store_true', help='Remove existing output before generating')
     parser.add_argument('--generate-pngs', action='store_true', help='Generate PNGs for diagrams without them (slow)')
     parser.add_argument('--clusters', type=int, help='Alias for --spaces')
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-extract keywords from every DrawIO file instead of using the keyword cache")
 
     args = parser.parse_args()
 
@@ -658,7 +881,8 @@ def main():
         return
 
     # Cluster diagrams by keyword
-    groups = cluster_by_keywords(diagrams, target_spaces=target_spaces)
+    groups = cluster_by_keywords(diagrams, target_spaces=target_spaces,
+                                 cache_path=None if args.no_cache else KEYWORD_CACHE_FILE)
 
     # Create output structure
     space_counts = create_output_structure(
@@ -6,29 +6,50 @@ This script finds all DrawIO files that don't have matching PNG files
 and generates them using the local draw.io desktop application.
 
 Usage:
-    python scripts/generate_pngs.py [--limit N] [--parallel N]
+    python scripts/generate_pngs.py [--limit N] [--parallel N] [--batch-size N]
 
-    --limit N     Only process first N files (for testing)
-    --parallel N  Number of parallel processes (default: 4)
+    --limit N       Only process first N files (for testing)
+    --parallel N    Number of parallel processes (default: 4)
+    --batch-size N  Files exported per draw.io launch (default: 64; 1 = one file per launch)
+    --verbose       Print a line for every exported file
+
+Progress is printed every 100 files; on Linux/WSL, `kill -USR1 <pid>` prints
+a snapshot on demand.
 
 Each worker uses a separate temp directory to avoid cache conflicts.
+
+If the headless drawio-batch exporter (npm install -g drawio-batch) is on the
+PATH it is used instead of draw.io.exe, one file per run without the Electron
+startup; draw.io.exe stays the fallback.
+
+Generated PNGs are tracked by a hash of the DrawIO content they were rendered
+from (generated_pngs/.png_cache.json): an edited source is re-rendered, and a
+source whose content was already rendered under another name gets a hard link
+to that PNG instead of a draw.io run.
 """
 
 import os
 import sys
+import json
+import hashlib
+import signal
 import subprocess
 import argparse
 import shutil
 import tempfile
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
 import time
 import multiprocessing
 
 # Detect platform and set paths accordingly
 import platform
 
-if platform.system() == 'Windows':
+# Resolved once: the workers check it for every file they export
+IS_WINDOWS = platform.system() == 'Windows'
+
+if IS_WINDOWS:
     # Windows paths
     SOURCE_DIR = r"C:\git\drawio_c4_lint\c4_github_examples\Data"
     DRAWIO_EXE = r"C:\Program Files\draw.io\draw.io.exe"
@@ -39,47 +60,137 @@ else:
     DRAWIO_EXE = "/mnt/c/Program Files/draw.io/draw.io.exe"
     TEMP_BASE = "/mnt/c/temp/drawio_workers"
 
+# Headless Node exporter, preferred over draw.io.exe when installed
+DRAWIO_BATCH_EXE = shutil.which('drawio-batch')
+
 DRAWIO_DIR = os.path.join(SOURCE_DIR, "drawio_github")
 PNG_OUTPUT_DIR = os.path.join(SOURCE_DIR, "generated_pngs")
 
+# {'sources': {drawio filename: [mtime_ns, size, content hash]},
+#  'rendered': {PNG basename: content hash it was rendered from}}
+PNG_CACHE_FILE = os.path.join(PNG_OUTPUT_DIR, ".png_cache.json")
+
 def get_drawio_files():
     """Get list of all DrawIO files."""
-    files = []
-    for f in os.listdir(DRAWIO_DIR):
-        if f.endswith('.drawio'):
-            files.append(f)
-    return sorted(files)
+    with os.scandir(DRAWIO_DIR) as entries:
+        return sorted(entry.name for entry in entries if entry.name.endswith('.drawio'))
+
+def get_png_bases(directory):
+    """Get set of PNG basenames in a directory (empty if it doesn't exist)."""
+    try:
+        with os.scandir(directory) as entries:
+            # Remove .png extension to get the base name, e.g. "diagram.drawio--owner--repo"
+            return {entry.name[:-4] for entry in entries if entry.name.endswith('.png')}
+    except FileNotFoundError:
+        return set()
 
 def get_existing_pngs():
     """Get set of PNG basenames that already exist."""
-    existing = set()
-
-    # Check original PNG location (flat in SOURCE_DIR)
-    for f in os.listdir(SOURCE_DIR):
-        if f.endswith('.png'):
-            # Remove .png extension to get the base name
-            base = f[:-4]  # e.g., "diagram.drawio--owner--repo"
-            existing.add(base)
-
-    # Check generated PNG location
-    if os.path.exists(PNG_OUTPUT_DIR):
-        for f in os.listdir(PNG_OUTPUT_DIR):
-            if f.endswith('.png'):
-                base = f[:-4]
-                existing.add(base)
-
-    return existing
-
-def get_missing_pngs(drawio_files, existing_pngs):
-    """Get list of DrawIO files that don't have corresponding PNGs."""
+    # Original PNGs (flat in SOURCE_DIR) plus generated ones
+    return get_png_bases(SOURCE_DIR) | get_png_bases(PNG_OUTPUT_DIR)
+
+def load_png_cache(cache_path):
+    """Load the generated-PNG cache, or an empty one if missing or unreadable."""
+    cache = {'sources': {}, 'rendered': {}}
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"  Warning: Could not read PNG cache {cache_path}: {e}")
+    return cache
+
+def save_png_cache(cache_path, cache):
+    """Write the generated-PNG cache via a temp file so it is never left half-written."""
+    tmp_path = cache_path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, separators=(',', ':'))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"  Warning: Could not save PNG cache {cache_path}: {e}")
+
+def source_digest(drawio_filename, sources):
+    """Content hash of a DrawIO file, rehashed only if its mtime or size changed.
+
+    Args:
+        drawio_filename: File name in DRAWIO_DIR
+        sources: The cache's {filename: [mtime_ns, size, hash]}, updated in place
+
+    Returns:
+        Hex digest, or None if the file can't be read
+    """
+    path = os.path.join(DRAWIO_DIR, drawio_filename)
+    try:
+        st = os.stat(path)
+        entry = sources.get(drawio_filename)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+        with open(path, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+    sources[drawio_filename] = [st.st_mtime_ns, st.st_size, digest]
+    return digest
+
+def get_missing_pngs(drawio_files, original_pngs, generated_pngs, cache):
+    """Get DrawIO files that need a PNG rendered, and those that can reuse one.
+
+    An original PNG always counts. A generated PNG counts while its source
+    still has the content it was rendered from; PNGs generated before the
+    cache existed are taken as current.
+
+    Returns:
+        (missing, reuse): files to render, and (file, PNG basename) pairs
+        whose content is already (or about to be) rendered under that name
+    """
+    rendered = cache['rendered']
+    # Content hash -> a PNG basename holding that content
+    by_digest = {digest: base for base, digest in rendered.items() if base in generated_pngs}
+
     missing = []
+    reuse = []
     for f in drawio_files:
         # DrawIO filename: diagram.drawio--owner--repo.drawio
         # PNG filename: diagram.drawio--owner--repo.png (without the .drawio extension)
-        base = f[:-7] if f.endswith('.drawio') else f  # Remove .drawio
-        if base not in existing_pngs:
+        base = f[:-7]  # Remove .drawio (get_drawio_files only returns *.drawio)
+        if base in original_pngs:
+            continue
+
+        digest = source_digest(f, cache['sources'])
+        if base in generated_pngs:
+            rendered.setdefault(base, digest)
+            if rendered[base] == digest:
+                by_digest.setdefault(digest, base)
+                continue
+
+        if digest is not None and digest in by_digest:
+            reuse.append((f, by_digest[digest]))
+        else:
             missing.append(f)
-    return missing
+            if digest is not None:
+                by_digest[digest] = base
+    return missing, reuse
+
+def link_png(source_base, drawio_filename):
+    """Hard-link (or copy) an existing generated PNG to a DrawIO file's PNG name.
+
+    Returns:
+        True if the PNG is in place
+    """
+    base = drawio_filename[:-7] if drawio_filename.endswith('.drawio') else drawio_filename
+    source_path = os.path.join(PNG_OUTPUT_DIR, f"{source_base}.png")
+    output_path = os.path.join(PNG_OUTPUT_DIR, f"{base}.png")
+    tmp_path = output_path + '.tmp'
+    try:
+        try:
+            os.link(source_path, tmp_path)
+        except OSError:
+            shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, output_path)
+        return True
+    except OSError:
+        return False
 
 def wsl_to_windows_path(wsl_path):
     """Convert WSL /mnt/c/ path to Windows C:\\ path."""
@@ -90,6 +201,42 @@ def wsl_to_windows_path(wsl_path):
         return f"{drive}:{rest}"
     return wsl_path
 
+def run_drawio(cmd, timeout):
+    """Run draw.io, killing its whole process tree if it times out.
+
+    subprocess.run(timeout=) only kills the direct child, which leaves
+    Electron's renderer and GPU processes running. stdout is discarded and
+    stderr goes to a temp file, so Electron's chatter is never buffered.
+
+    Returns:
+        (returncode, first 200 bytes of stderr): decode only when reporting an error
+
+    Raises:
+        subprocess.TimeoutExpired once the process tree has been killed
+    """
+    with tempfile.TemporaryFile() as stderr_file:
+        if IS_WINDOWS:
+            proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=stderr_file,
+                                    creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+        else:
+            # Own session, so the process group id is its pid
+            proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=stderr_file,
+                                    start_new_session=True)
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            if IS_WINDOWS:
+                subprocess.run(['taskkill', '/F', '/T', '/PID', str(proc.pid)], capture_output=True)
+            else:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+            proc.wait()
+            raise
+        stderr_file.seek(0)
+        return proc.returncode, stderr_file.read(200)
+
 def get_worker_id():
     """Get a unique worker ID for this process."""
     return multiprocessing.current_process().name
@@ -97,47 +244,41 @@ def get_worker_id():
 def generate_png(args):
     """Generate PNG from a DrawIO file. Returns (filename, success, message).
 
-    Args is a tuple of (drawio_filename, worker_num) to support per-worker temp dirs.
+    Args is a tuple of (drawio_filename, worker_num), matching generate_png_batch.
     """
-    drawio_filename, worker_num = args
+    drawio_filename, _ = args
     input_path = os.path.join(DRAWIO_DIR, drawio_filename)
 
     # Output name: remove .drawio extension and add .png
     base = drawio_filename[:-7] if drawio_filename.endswith('.drawio') else drawio_filename
     output_path = os.path.join(PNG_OUTPUT_DIR, f"{base}.png")
 
-    # Create per-worker temp directory to avoid cache conflicts
-    if platform.system() == 'Windows':
-        worker_temp = os.path.join(TEMP_BASE, f"worker{worker_num}")
-    else:
-        worker_temp = os.path.join(TEMP_BASE, f"worker{worker_num}")
-
-    os.makedirs(worker_temp, exist_ok=True)
-
     # On Windows, use paths directly; on WSL, convert to Windows paths for draw.io.exe
-    if platform.system() == 'Windows':
+    if IS_WINDOWS:
         win_input = input_path
         win_output = output_path
-        win_temp = worker_temp
     else:
         win_input = wsl_to_windows_path(input_path)
         win_output = wsl_to_windows_path(output_path)
-        win_temp = wsl_to_windows_path(worker_temp)
 
     try:
-        # Simple draw.io CLI: -x export, -f format, -o output
-        # Note: Running with --parallel 1 is recommended to avoid cache conflicts
-        result = subprocess.run(
-            [DRAWIO_EXE, '-x', '-f', 'png', '-o', win_output, win_input],
-            capture_output=True,
-            text=True,
-            timeout=60  # 60 second timeout per file
-        )
-
-        if result.returncode == 0 and os.path.exists(output_path):
+        # A stale PNG may be hard-linked to another diagram's: replace it, don't write through it
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+        if DRAWIO_BATCH_EXE:
+            # Runs natively, so it takes this side's paths
+            cmd = [DRAWIO_BATCH_EXE, '-f', 'png', input_path, output_path]
+        else:
+            # Simple draw.io CLI: -x export, -f format, -o output
+            # Note: Running with --parallel 1 is recommended to avoid cache conflicts
+            cmd = [DRAWIO_EXE, '-x', '-f', 'png', '-o', win_output, win_input]
+        returncode, stderr = run_drawio(cmd, timeout=60)  # 60 second timeout per file
+
+        if returncode == 0 and os.path.exists(output_path):
             return (drawio_filename, True, "OK")
         else:
-            error = result.stderr[:200] if result.stderr else "Unknown error"
+            error = stderr[:200].decode('utf-8', 'replace') if stderr else "Unknown error"
             return (drawio_filename, False, error)
 
     except subprocess.TimeoutExpired:
@@ -145,11 +286,105 @@ def generate_png(args):
     except Exception as e:
         return (drawio_filename, False, str(e)[:200])
 
+def generate_png_batch(args):
+    """Generate PNGs for several DrawIO files with one draw.io folder export.
+
+    draw.io/Electron startup dominates a single-file export, so the batch is
+    linked into a staging folder and exported in one run.
+
+    Args is a tuple of (drawio_filenames, worker_num) to support per-worker temp dirs.
+    Returns a list of (filename, success, message), one per file.
+    """
+    drawio_filenames, worker_num = args
+    if len(drawio_filenames) == 1 or DRAWIO_BATCH_EXE:
+        # drawio-batch exports one file per run, with no Electron startup to share
+        return [generate_png((drawio_filename, worker_num)) for drawio_filename in drawio_filenames]
+
+    worker_temp = os.path.join(TEMP_BASE, f"worker{worker_num}")
+    os.makedirs(worker_temp, exist_ok=True)
+
+    results = []
+    try:
+        # Unique per batch: two batches can share a worker number
+        staging = tempfile.mkdtemp(prefix='batch-', dir=worker_temp)
+        try:
+            staged_input = os.path.join(staging, 'in')
+            staged_output = os.path.join(staging, 'out')
+            os.makedirs(staged_input)
+            os.makedirs(staged_output)
+            for drawio_filename in drawio_filenames:
+                input_path = os.path.join(DRAWIO_DIR, drawio_filename)
+                staged_path = os.path.join(staged_input, drawio_filename)
+                try:
+                    os.link(input_path, staged_path)
+                except OSError:
+                    shutil.copyfile(input_path, staged_path)
+
+            # On Windows, use paths directly; on WSL, convert to Windows paths for draw.io.exe
+            if IS_WINDOWS:
+                win_input, win_output = staged_input, staged_output
+            else:
+                win_input = wsl_to_windows_path(staged_input)
+                win_output = wsl_to_windows_path(staged_output)
+
+            stderr = b''
+            timed_out = False
+            try:
+                # -x export, -f format, -o output folder, input folder
+                _, stderr = run_drawio(
+                    [DRAWIO_EXE, '-x', '-f', 'png', '-o', win_output, win_input],
+                    timeout=60 * len(drawio_filenames)  # 60 seconds per file
+                )
+            except subprocess.TimeoutExpired:
+                timed_out = True  # keep whatever was exported before it
+            error = None
+
+            for drawio_filename in drawio_filenames:
+                base = drawio_filename[:-7] if drawio_filename.endswith('.drawio') else drawio_filename
+                # Folder exports are named after the input, with or without its extension
+                for exported in (f"{base}.png", f"{drawio_filename}.png"):
+                    exported_path = os.path.join(staged_output, exported)
+                    if os.path.exists(exported_path):
+                        # Replaces (never writes through) a stale, possibly hard-linked PNG
+                        os.replace(exported_path, os.path.join(PNG_OUTPUT_DIR, f"{base}.png"))
+                        results.append((drawio_filename, True, "OK"))
+                        break
+                else:
+                    if error is None:
+                        error = ("Timeout" if timed_out
+                                 else stderr[:200].decode('utf-8', 'replace') if stderr else "Not exported")
+                    results.append((drawio_filename, False, error))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    except Exception as e:
+        done = {filename for filename, _, _ in results}
+        results.extend((f, False, str(e)[:200]) for f in drawio_filenames if f not in done)
+
+    return results
+
+def run_bounded(executor, fn, items, window):
+    """Yield fn(item) results as they finish, with at most window tasks queued at once.
+
+    Keeps the pool busy without creating a future for every item up front.
+    """
+    items = iter(items)
+    inflight = {executor.submit(fn, item) for item in islice(items, window)}
+    while inflight:
+        done, inflight = wait(inflight, return_when=FIRST_COMPLETED)
+        # Refill before handing results back, so workers don't wait on the caller
+        for item in islice(items, len(done)):
+            inflight.add(executor.submit(fn, item))
+        for future in done:
+            yield future.result()
+
 def main():
     parser = argparse.ArgumentParser(description='Generate PNGs from DrawIO files')
     parser.add_argument('--limit', type=int, help='Limit number of files to process')
     parser.add_argument('--parallel', type=int, default=4, help='Number of parallel processes')
+    parser.add_argument('--batch-size', type=int, default=64,
+                        help='DrawIO files exported per draw.io launch (1 = one file per launch)')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be done')
+    parser.add_argument('--verbose', action='store_true', help='Print a line for every exported file')
     args = parser.parse_args()
 
     print("=" * 70)
@@ -157,26 +392,35 @@ def main():
     print("=" * 70)
     print(f"\nSource: {DRAWIO_DIR}")
     print(f"Output: {PNG_OUTPUT_DIR}")
-    print(f"draw.io: {DRAWIO_EXE}")
+    print(f"draw.io: {DRAWIO_BATCH_EXE or DRAWIO_EXE}")
 
     # Check draw.io exists
-    if not os.path.exists(DRAWIO_EXE):
+    if not DRAWIO_BATCH_EXE and not os.path.exists(DRAWIO_EXE):
         print(f"\nERROR: draw.io not found at {DRAWIO_EXE}")
         sys.exit(1)
 
     # Create output directory
     os.makedirs(PNG_OUTPUT_DIR, exist_ok=True)
 
-    # Get files
+    # Get files: the three listings are independent and each is mostly
+    # waiting on the (often /mnt/c) filesystem, so run them side by side
     print("\nScanning files...")
-    drawio_files = get_drawio_files()
+    with ThreadPoolExecutor(max_workers=3) as scan_pool:
+        drawio_scan = scan_pool.submit(get_drawio_files)
+        original_scan = scan_pool.submit(get_png_bases, SOURCE_DIR)
+        generated_scan = scan_pool.submit(get_png_bases, PNG_OUTPUT_DIR)
+        drawio_files = drawio_scan.result()
+        original_pngs = original_scan.result()
+        generated_pngs = generated_scan.result()
     print(f"  Found {len(drawio_files):,} DrawIO files")
 
-    existing_pngs = get_existing_pngs()
-    print(f"  Found {len(existing_pngs):,} existing PNG files")
+    print(f"  Found {len(original_pngs | generated_pngs):,} existing PNG files")
 
-    missing = get_missing_pngs(drawio_files, existing_pngs)
+    cache = load_png_cache(PNG_CACHE_FILE)
+    missing, reuse = get_missing_pngs(drawio_files, original_pngs, generated_pngs, cache)
     print(f"  Missing {len(missing):,} PNG files")
+    if reuse:
+        print(f"  {len(reuse):,} can reuse a PNG rendered from identical content")
 
     if args.limit:
         missing = missing[:args.limit]
@@ -190,7 +434,8 @@ def main():
             print(f"  ... and {len(missing) - 20} more")
         return
 
-    if not missing:
+    if not missing and not reuse:
+        save_png_cache(PNG_CACHE_FILE, cache)
         print("\nAll PNGs already exist!")
         return
 
@@ -206,23 +451,49 @@ def main():
         # Create subdirs that draw.io/Electron might need
         os.makedirs(os.path.join(worker_dir, 'electron'), exist_ok=True)
 
-    # Assign each file to a worker (round-robin)
-    work_items = [(f, i % args.parallel) for i, f in enumerate(missing)]
+    # Split into batches, each assigned to a worker (round-robin)
+    batch_size = max(1, args.batch_size)
+    work_items = ((missing[k:k + batch_size], n % args.parallel)
+                  for n, k in enumerate(range(0, len(missing), batch_size)))
 
     start_time = time.time()
     success_count = 0
     error_count = 0
+    i = 0
 
-    with ProcessPoolExecutor(max_workers=args.parallel) as executor:
-        futures = {executor.submit(generate_png, item): item[0] for item in work_items}
+    def progress_line():
+        elapsed = time.time() - start_time
+        rate = i / elapsed if elapsed > 0 else 0
+        eta = (len(missing) - i) / rate if rate > 0 else 0
+        return (f"  === Progress: {i}/{len(missing)} ({success_count} OK, {error_count} errors) "
+                f"- {rate:.1f}/s, ETA: {eta/60:.1f}m ===")
+
+    # On-demand snapshot between the periodic lines (forked workers inherit
+    # the handler, so only the main process answers)
+    main_pid = os.getpid()
 
-        for i, future in enumerate(as_completed(futures), 1):
-            filename, success, message = future.result()
+    def print_snapshot(signum, frame):
+        if os.getpid() == main_pid:
+            print(progress_line(), file=sys.stderr, flush=True)
+
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, print_snapshot)
+
+    with ProcessPoolExecutor(max_workers=args.parallel) as executor:
+        batch_results = (result
+                         for results in run_bounded(executor, generate_png_batch, work_items, args.parallel * 2)
+                         for result in results)
+        for filename, success, message in batch_results:
+            i += 1
 
             if success:
                 success_count += 1
-                # Show successful exports
-                print(f"  OK: {filename[:70]}...")
+                base = filename[:-7] if filename.endswith('.drawio') else filename
+                entry = cache['sources'].get(filename)
+                if entry:
+                    cache['rendered'][base] = entry[2]
+                if args.verbose:
+                    print(f"  OK: {filename[:70]}...")
             else:
                 error_count += 1
                 # Only show first 10 errors to reduce noise
@@ -232,16 +503,25 @@ def main():
                     print(f"  ... (suppressing further error details)")
 
             if i % 100 == 0 or i == len(missing):
-                elapsed = time.time() - start_time
-                rate = i / elapsed if elapsed > 0 else 0
-                eta = (len(missing) - i) / rate if rate > 0 else 0
-                print(f"  === Progress: {i}/{len(missing)} ({success_count} OK, {error_count} errors) "
-                      f"- {rate:.1f}/s, ETA: {eta/60:.1f}m ===")
+                print(progress_line())
+                save_png_cache(PNG_CACHE_FILE, cache)
+
+    # Identical content rendered under another name: link instead of rendering
+    linked_count = 0
+    for filename, source_base in reuse:
+        digest = cache['sources'][filename][2]
+        # The shared PNG may not have been rendered this run (--limit or an error)
+        if cache['rendered'].get(source_base) == digest and link_png(source_base, filename):
+            linked_count += 1
+            base = filename[:-7] if filename.endswith('.drawio') else filename
+            cache['rendered'][base] = digest
+    save_png_cache(PNG_CACHE_FILE, cache)
 
     elapsed = time.time() - start_time
     print("-" * 70)
     print(f"Completed in {elapsed/60:.1f} minutes")
     print(f"  Success: {success_count:,}")
+    print(f"  Linked: {linked_count:,}")
     print(f"  Errors: {error_count:,}")
 
     # Count total PNGs now available
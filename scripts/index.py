@@ -4,7 +4,7 @@ CLI script to build the DrawIO diagram search index.
 Run this after extracting diagrams and before starting the web server.
 
 Usage:
-    python scripts/index.py              # Build index
+    python scripts/index.py              # Build index, or update it for changed files
     python scripts/index.py --rebuild    # Clear and rebuild index
 """
 
@@ -33,7 +33,7 @@ def main():
     parser.add_argument(
         '--rebuild',
         action='store_true',
-        help='Clear existing index and rebuild from scratch'
+        help='Clear existing index and rebuild from scratch (default: re-index only changed files)'
     )
     parser.add_argument(
         '--config',
@@ -67,20 +67,20 @@ def main():
         print("Please run 'python scripts/extract.py' first to extract diagrams from Confluence.")
         sys.exit(1)
 
-    # Check if index already exists
-    if db_is_populated() and index_is_populated() and not args.rebuild:
-        print("\nIndex already exists!")
-        response = input("Rebuild? (y/N): ").strip().lower()
-        if response != 'y':
-            print("Aborted.")
-            return
+    # An existing index is updated from the files whose content changed
+    incremental = not args.rebuild and db_is_populated() and index_is_populated()
+    if incremental:
+        print("\nIndex already exists: re-indexing changed files only (--rebuild for a full pass)")
 
     print("\nStarting indexing...")
     print("This may take several minutes depending on the number of diagrams.\n")
 
     try:
-        count = index_all_diagrams(progress_callback)
-        print(f"\n\nSuccessfully indexed {count} diagrams!")
+        count = index_all_diagrams(progress_callback, incremental=incremental)
+        if incremental:
+            print(f"\n\nSuccessfully re-indexed {count} changed diagrams!")
+        else:
+            print(f"\n\nSuccessfully indexed {count} diagrams!")
         print("\nNext step: Run 'python scripts/serve.py' to start the web browser")
 
     except Exception as e:
@@ -12,7 +12,13 @@ Usage:
     python scripts/profile_performance.py                    # Run all profiles
     python scripts/profile_performance.py --index            # Profile indexing only
     python scripts/profile_performance.py --search "query"   # Profile search
+    python scripts/profile_performance.py --search "query" --cold  # ...reopening the searcher each time
     python scripts/profile_performance.py --stats            # Show index/DB stats
+    python scripts/profile_performance.py --index --profile-out profiles  # Also save raw .prof files
+
+Raw .prof files can be explored offline (snakeviz, pstats). For a sampling
+profile with no tracing overhead, run the script under py-spy instead:
+    py-spy record -o flame.svg -- python scripts/profile_performance.py --index
 """
 
 import os
@@ -21,7 +27,6 @@ import time
 import argparse
 import cProfile
 import pstats
-import io
 import sqlite3
 from datetime import datetime
 
@@ -56,6 +61,57 @@ def format_time(seconds):
         return f"{seconds/60:.1f} min"
 
 
+def dir_usage(directory, suffix='', recursive=True):
+    """
+    Count and total the size of the files in a directory in one scandir pass.
+
+    Args:
+        directory: Directory to scan (missing counts as empty)
+        suffix: Only count files whose name ends with this (a str or tuple of str)
+        recursive: Descend into subdirectories
+
+    Returns:
+        (file_count, total_size)
+    """
+    count = 0
+    size = 0
+    pending = [directory]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        pending.append(entry.path)
+                elif entry.name.endswith(suffix) and entry.is_file():
+                    count += 1
+                    size += entry.stat().st_size
+    return count, size
+
+
+def report_profile(profiler, top_n, name, profile_out=None):
+    """
+    Print the top functions by cumulative time, optionally saving the raw stats.
+
+    Args:
+        profiler: Finished cProfile.Profile
+        top_n: Number of functions to print
+        name: Base name for the saved file (<name>.prof)
+        profile_out: Directory to save raw stats in, or None
+    """
+    # Straight to stdout: no intermediate text buffer
+    pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(top_n)
+
+    if profile_out:
+        os.makedirs(profile_out, exist_ok=True)
+        path = os.path.join(profile_out, f"{name}.prof")
+        profiler.dump_stats(path)
+        print(f"Raw profile saved to {path}")
+
+
 def get_index_stats():
     """Get statistics about the index and database."""
     settings = get_settings()
@@ -114,45 +170,13 @@ def get_index_stats():
 
     # Whoosh index stats
     index_dir = os.path.join(settings['content_directory'], 'whoosh_index')
-    if os.path.exists(index_dir):
-        total_size = 0
-        file_count = 0
-        for f in os.listdir(index_dir):
-            fp = os.path.join(index_dir, f)
-            if os.path.isfile(fp):
-                total_size += os.path.getsize(fp)
-                file_count += 1
-        stats['index_size'] = total_size
-        stats['index_files'] = file_count
-    else:
-        stats['index_size'] = 0
-        stats['index_files'] = 0
+    stats['index_files'], stats['index_size'] = dir_usage(index_dir, recursive=False)
 
     # Metadata/images stats
-    metadata_dir = settings['metadata_directory']
-    images_dir = settings['images_directory']
-
-    metadata_count = 0
-    metadata_size = 0
-    if os.path.exists(metadata_dir):
-        for root, dirs, files in os.walk(metadata_dir):
-            for f in files:
-                if f.endswith('.json'):
-                    metadata_count += 1
-                    metadata_size += os.path.getsize(os.path.join(root, f))
-    stats['metadata_count'] = metadata_count
-    stats['metadata_size'] = metadata_size
-
-    images_count = 0
-    images_size = 0
-    if os.path.exists(images_dir):
-        for root, dirs, files in os.walk(images_dir):
-            for f in files:
-                if f.endswith('.png'):
-                    images_count += 1
-                    images_size += os.path.getsize(os.path.join(root, f))
-    stats['images_count'] = images_count
-    stats['images_size'] = images_size
+    stats['metadata_count'], stats['metadata_size'] = dir_usage(
+        settings['metadata_directory'], ('.json', '.jsonl'))  # per-diagram .json and per-space diagrams.jsonl
+    stats['images_count'], stats['images_size'] = dir_usage(
+        settings['images_directory'], ('.png', '.jpg', '.jpeg'))  # screenshotter --image-format jpeg writes .jpg
 
     return stats
 
@@ -186,7 +210,7 @@ def print_stats():
     return stats
 
 
-def profile_indexing(verbose=False):
+def profile_indexing(verbose=False, profile_out=None):
     """Profile the indexing process."""
     print("=" * 60)
     print("PROFILING: Indexing")
@@ -223,24 +247,27 @@ def profile_indexing(verbose=False):
     print(f"\nTop 15 time-consuming functions:")
     print("-" * 60)
 
-    s = io.StringIO()
-    ps = pstats.Stats(profiler, stream=s).sort_stats('cumulative')
-    ps.print_stats(15)
-    print(s.getvalue())
+    report_profile(profiler, 15, 'indexing', profile_out)
 
     return elapsed, total
 
 
-def profile_search(query, num_iterations=10):
-    """Profile search performance."""
+def profile_search(query, num_iterations=10, cold=False, profile_out=None):
+    """
+    Profile search performance.
+
+    By default the query is parsed once and every iteration runs on one open
+    searcher, which is the per-query cost. cold=True opens a fresh searcher
+    and re-parses the query on every iteration instead.
+    """
     print("=" * 60)
-    print(f"PROFILING: Search (query='{query}')")
+    print(f"PROFILING: Search (query='{query}'{', cold' if cold else ''})")
     print("=" * 60)
 
     # Import here
-    from browser.app import init_db, init_index, get_index_dir
+    from browser.app import init_db, init_index, get_index_dir, get_search_parser
     from whoosh.index import open_dir
-    from whoosh.qparser import MultifieldParser
+    from whoosh.qparser import MultifieldParser, OrGroup
 
     init_db()
     init_index()
@@ -248,10 +275,9 @@ def profile_search(query, num_iterations=10):
     index_dir = get_index_dir()
     ix = open_dir(index_dir)
 
-    # Warm up
+    # Warm up (with the same cached parser the /search route uses)
+    q = get_search_parser(ix.schema).parse(query)
     with ix.searcher() as searcher:
-        parser = MultifieldParser(["diagram_name", "page_title", "content"], ix.schema)
-        q = parser.parse(query)
         _ = searcher.search(q, limit=20)
 
     # Profile multiple iterations
@@ -259,19 +285,30 @@ def profile_search(query, num_iterations=10):
     result_count = 0
 
     profiler = cProfile.Profile()
-    profiler.enable()
 
-    for i in range(num_iterations):
-        start = time.time()
+    if cold:
+        profiler.enable()
+        for i in range(num_iterations):
+            start = time.time()
+            with ix.searcher() as searcher:
+                parser = MultifieldParser(['diagram_name', 'page_title', 'content', 'author'],
+                                          schema=ix.schema, group=OrGroup)
+                q = parser.parse(query)
+                results = searcher.search(q, limit=20)
+                result_count = len(results)
+            elapsed = time.time() - start
+            times.append(elapsed)
+        profiler.disable()
+    else:
         with ix.searcher() as searcher:
-            parser = MultifieldParser(["diagram_name", "page_title", "content"], ix.schema)
-            q = parser.parse(query)
-            results = searcher.search(q, limit=20)
-            result_count = len(results)
-        elapsed = time.time() - start
-        times.append(elapsed)
-
-    profiler.disable()
+            profiler.enable()
+            for i in range(num_iterations):
+                start = time.time()
+                results = searcher.search(q, limit=20)
+                result_count = len(results)
+                elapsed = time.time() - start
+                times.append(elapsed)
+            profiler.disable()
 
     avg_time = sum(times) / len(times)
     min_time = min(times)
@@ -287,10 +324,7 @@ def profile_search(query, num_iterations=10):
     print(f"\nTop 10 time-consuming functions:")
     print("-" * 60)
 
-    s = io.StringIO()
-    ps = pstats.Stats(profiler, stream=s).sort_stats('cumulative')
-    ps.print_stats(10)
-    print(s.getvalue())
+    report_profile(profiler, 10, 'search', profile_out)
 
     return avg_time, result_count
 
@@ -309,12 +343,24 @@ def profile_db_queries():
         return
 
     conn = sqlite3.connect(db_path)
+    # Per-connection read tuning only: nothing here changes the database file
+    conn.execute('PRAGMA mmap_size=268435456')
+    conn.execute('PRAGMA cache_size=-65536')
+    conn.execute('PRAGMA temp_store=MEMORY')
 
     queries = [
         ("Count all diagrams", "SELECT COUNT(*) FROM diagrams"),
         ("Get all diagrams", "SELECT * FROM diagrams"),
         ("Search by name (LIKE)", "SELECT * FROM diagrams WHERE diagram_name LIKE '%test%'"),
         ("Search content (LIKE)", "SELECT * FROM diagrams WHERE content_text LIKE '%test%'"),
+        ("Search by name (FTS5)", """
+            SELECT d.* FROM diagrams d JOIN temp.diagrams_fts f ON f.rowid = d.id
+            WHERE f.diagram_name MATCH 'test'
+        """),
+        ("Search content (FTS5)", """
+            SELECT d.* FROM diagrams d JOIN temp.diagrams_fts f ON f.rowid = d.id
+            WHERE f.content_text MATCH 'test'
+        """),
         ("Join with applications", """
             SELECT d.*, a.name as app_name
             FROM diagrams d
@@ -324,6 +370,19 @@ def profile_db_queries():
         ("Group by space", "SELECT space_key, COUNT(*) FROM diagrams GROUP BY space_key"),
     ]
 
+    # The same substring searches through an FTS5 trigram index, side by side
+    # with LIKE. It lives in the connection's temp schema: the file is untouched
+    try:
+        start = time.time()
+        conn.execute("CREATE VIRTUAL TABLE temp.diagrams_fts "
+                     "USING fts5(diagram_name, content_text, tokenize='trigram')")
+        conn.execute("INSERT INTO temp.diagrams_fts(rowid, diagram_name, content_text) "
+                     "SELECT id, diagram_name, content_text FROM diagrams")
+        print(f"\nBuilt temporary FTS5 trigram index in {format_time(time.time() - start)}")
+    except sqlite3.OperationalError as e:
+        print(f"\nSkipping FTS5 comparison (needs SQLite 3.34+ with FTS5): {e}")
+        queries = [(name, query) for name, query in queries if 'diagrams_fts' not in query]
+
     for name, query in queries:
         times = []
         rows = 0
@@ -332,8 +391,8 @@ def profile_db_queries():
             start = time.time()
             c = conn.cursor()
             c.execute(query)
-            results = c.fetchall()
-            rows = len(results)
+            # Step through the rows without building a list of all of them
+            rows = sum(1 for _ in c)
             elapsed = time.time() - start
             times.append(elapsed)
 
@@ -342,10 +401,14 @@ def profile_db_queries():
         print(f"  Rows:     {rows:,}")
         print(f"  Time:     {format_time(avg)} (avg of 5)")
 
+        # SCAN = full table walk, SEARCH = index lookup
+        plan = [step[-1] for step in conn.execute(f'EXPLAIN QUERY PLAN {query}')]
+        print(f"  Plan:     {'; '.join(plan)}")
+
     conn.close()
 
 
-def profile_app_startup():
+def profile_app_startup(profile_out=None):
     """Profile Flask app startup time."""
     print("=" * 60)
     print("PROFILING: App Startup")
@@ -372,10 +435,7 @@ def profile_app_startup():
     print(f"\nTop 10 time-consuming imports/initializations:")
     print("-" * 60)
 
-    s = io.StringIO()
-    ps = pstats.Stats(profiler, stream=s).sort_stats('cumulative')
-    ps.print_stats(10)
-    print(s.getvalue())
+    report_profile(profiler, 10, 'startup', profile_out)
 
 
 def main():
@@ -388,12 +448,16 @@ def main():
                         help='Profile indexing')
     parser.add_argument('--search', type=str, metavar='QUERY',
                         help='Profile search with given query')
+    parser.add_argument('--cold', action='store_true',
+                        help='With --search: open a new searcher and re-parse the query each iteration')
     parser.add_argument('--db', action='store_true',
                         help='Profile database queries')
     parser.add_argument('--startup', action='store_true',
                         help='Profile app startup')
     parser.add_argument('--all', action='store_true',
                         help='Run all profiles')
+    parser.add_argument('--profile-out', metavar='DIR',
+                        help='Also save raw cProfile stats (<section>.prof) in DIR')
     parser.add_argument('--verbose', '-v', action='store_true',
                         help='Verbose output')
 
@@ -411,7 +475,7 @@ def main():
         print()
 
     if args.startup or args.all:
-        profile_app_startup()
+        profile_app_startup(profile_out=args.profile_out)
         print()
 
     if args.db or args.all:
@@ -419,14 +483,14 @@ def main():
         print()
 
     if args.index or args.all:
-        profile_indexing(verbose=args.verbose)
+        profile_indexing(verbose=args.verbose, profile_out=args.profile_out)
         print()
 
     if args.search:
-        profile_search(args.search)
+        profile_search(args.search, cold=args.cold, profile_out=args.profile_out)
         print()
     elif args.all:
-        profile_search("test")
+        profile_search("test", cold=args.cold, profile_out=args.profile_out)
         print()
 
 
@@ -5,13 +5,44 @@ Backs up full data and copies lightweight demo subset.
 """
 
 import os
+import sys
 import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 DEMO_DIR = os.path.join(BASE_DIR, 'demo_data')
 BACKUP_DIR = os.path.join(BASE_DIR, 'data_full_backup')
 
+# Parallel file copies when cp can't be used (I/O bound)
+COPY_THREADS = min(16, (os.cpu_count() or 1) * 2)
+
+
+def copy_tree_parallel(src, dst):
+    """Like shutil.copytree, with the file copies spread over a thread pool."""
+    src_paths, dst_paths = [], []
+    for root, dirs, files in os.walk(src):
+        target = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(target, exist_ok=True)
+        for name in files:
+            src_paths.append(os.path.join(root, name))
+            dst_paths.append(os.path.join(target, name))
+    with ThreadPoolExecutor(max_workers=COPY_THREADS) as pool:
+        # list() re-raises the first copy error
+        list(pool.map(shutil.copy2, src_paths, dst_paths))
+
+
+def copy_demo_data(src, dst):
+    """Copy the demo tree, sharing blocks copy-on-write where the filesystem allows."""
+    if sys.platform.startswith('linux'):
+        # GNU cp clones extents on btrfs/XFS and falls back to a normal copy elsewhere
+        result = subprocess.run(['cp', '-a', '--reflink=auto', src, dst], capture_output=True)
+        if result.returncode == 0:
+            return
+        shutil.rmtree(dst, ignore_errors=True)
+    copy_tree_parallel(src, dst)
+
 
 def main():
     print("Swapping in demo data for deployment...")
@@ -20,7 +51,7 @@ def main():
         print("ERROR: demo_data/ not found. Run create_demo_subset.py first.")
         return
 
-    # Backup current data
+    # Backup current data (a rename when both are on the same filesystem)
     if os.path.exists(DATA_DIR) and not os.path.exists(BACKUP_DIR):
         print(f"Backing up {DATA_DIR} to {BACKUP_DIR}...")
         shutil.move(DATA_DIR, BACKUP_DIR)
@@ -30,7 +61,7 @@ def main():
 
     # Copy demo data
     print(f"Copying {DEMO_DIR} to {DATA_DIR}...")
-    shutil.copytree(DEMO_DIR, DATA_DIR)
+    copy_demo_data(DEMO_DIR, DATA_DIR)
 
     print("Done! Now rebuild the index:")
     print("  python scripts/index.py --rebuild")